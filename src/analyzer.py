@@ -0,0 +1,645 @@
+"""
+Runs analyzers without a window, writing what they show to files
+
+    python -m analyzer report <directory> --output reports --component "Monthly Listens" --start 2020-01-01
+    python -m analyzer batch <folder of user folders> --output reports --processes 4
+    python -m analyzer import history.sqlite3 <directory>
+    python -m analyzer query history.sqlite3 top-listens --start 2020-01-01
+
+Text analyzers are written as .txt files and plots as .png files, with --csv also writing the tables and series they
+show as .csv files. The history is loaded and filtered once, however many analyzers are run, and histories bigger than
+the memory budget in the config are read a month at a time by the analyzers that can merge their results. Batches
+report on each user in a worker process and write a summary of every user together. Histories can also be imported
+into a SQLite `HistoryStore` and totalled up there by query.
+"""
+import argparse
+import calendar
+import collections
+import concurrent.futures
+import csv
+import dataclasses
+import datetime
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+import tzlocal
+from backports import zoneinfo
+
+import instrumentation
+import plugins
+import utils
+from analyzers import ANALYZERS, Analyzer, TextAnalyzer
+from analyzers.options import Artists
+from config import Config
+from cube import ListenCube
+from ingest import find_tracks_files, load_tracks, load_tracks_file
+from partitions import MonthPartitions
+from store import HistoryStore
+from tracktable import TrackTable, TrackView, to_ms
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+
+def file_name(analyzer_name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", analyzer_name.lower()).strip("_")
+
+
+def analyzer_types(names: Sequence[str], config: Config) -> Dict[str, Type[Analyzer]]:
+    """
+    The analyzers called `names`, or every analyzer if there aren't any names
+
+    Components in the component directory only run in the window, so only its analyzers are available here.
+    """
+    available: Dict[str, Any] = dict(ANALYZERS)
+    if config.component_directory is not None:
+        for analyzer in plugins.load_plugins(config.component_directory, Analyzer):
+            available[analyzer.name] = analyzer
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown analyzers {unknown}, expected some of {sorted(available)}")
+    return {
+        name: plugins.import_spec(available[name]) if isinstance(available[name], str) else available[name]
+        for name in (names or sorted(available))
+    }
+
+
+def filter_tracks(
+    tracks: TrackTable,
+    *,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    timezone: Optional[str] = None,
+) -> TrackTable:
+    """Filters `tracks` the way the date range and timezone filters do"""
+    view = TrackView(tracks)
+    if start is not None or end is not None:
+        with instrumentation.stage("filter DateRangeFilter"):
+            view = view.between(to_ms(start) if start else None, to_ms(end) if end else None)
+    if timezone:
+        with instrumentation.stage("filter Timezone"):
+            view = view.to_timezone(zoneinfo.ZoneInfo(timezone))
+    return view.table
+
+
+def option_values(analyzer: Type[Analyzer], tracks: TrackTable, *, artists: Optional[List[str]] = None) -> List[Any]:
+    return [
+        artists if artists is not None and isinstance(option, Artists) else option.default_value(tracks)
+        for option in analyzer.options
+    ]
+
+
+@dataclasses.dataclass
+class MergedHistory:
+    """A history that was analyzed a partition at a time, as the merged partial of each analyzer that can do that"""
+
+    loaded: int
+    plays: int
+    partials: Dict[str, Any]
+
+
+def load_partitions(path: str, directory: str, config: Config, errors: List[str]) -> MonthPartitions:
+    """Splits the streaming history files under `path` into partitions written to `directory`"""
+    if config.memory_budget_mb is None:
+        raise ValueError("Splitting a history into partitions needs a memory budget")
+    partitions = MonthPartitions(directory, config.memory_budget_mb * 2**20)
+    for file_path in find_tracks_files(path):
+        try:
+            partitions.add(
+                load_tracks_file(file_path, cache_directory=config.cache_directory, streaming=config.streaming_ingest)
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Error loading tracks file %r", file_path)
+            errors.append(os.path.basename(file_path))
+    return partitions
+
+
+def merge_partitions(
+    analyzers: Dict[str, Type[Analyzer]],
+    partitions: Iterable[TrackTable],
+    filter_: Callable[[TrackTable], TrackTable],
+) -> MergedHistory:
+    """Filters each partition and merges its partials into those of the partitions before it, one at a time"""
+    merging: Dict[str, Any] = {name: analyzer for name, analyzer in analyzers.items() if analyzer.supports_partials}
+    history = MergedHistory(loaded=0, plays=0, partials={})
+    for partition in partitions:
+        history.loaded += len(partition)
+        tracks = filter_(partition)
+        if not len(tracks):  # pylint: disable=len-as-condition
+            continue
+        for name, analyzer in merging.items():
+            with instrumentation.stage(f"partial {name}"):
+                partial = analyzer.partial(tracks, history.plays)
+                history.partials[name] = (
+                    analyzer.merge([history.partials[name], partial]) if name in history.partials else partial
+                )
+        history.plays += len(tracks)
+    return history
+
+
+def run_analyzer(
+    analyzer: Type[Analyzer],
+    history: Union[TrackTable, MergedHistory],
+    output: str,
+    *,
+    write_csv: bool = False,
+    artists: Optional[List[str]] = None,
+    dpi: int = 200,
+) -> List[str]:
+    """Analyzes `history`, returning the paths of the files the result was written to"""
+    if isinstance(history, MergedHistory):
+        if analyzer.name not in history.partials:
+            raise ValueError(f"{analyzer.name!r} needs the whole history at once, which is over the memory budget")
+        partial = history.partials[analyzer.name]
+        # There's no whole history to choose defaults by, so options start as they would for an empty one
+        args = option_values(analyzer, TrackTable.empty(), artists=artists)
+        with instrumentation.stage(f"compute {analyzer.name}"):
+            result = analyzer.compute_merged(partial, *args)  # type: ignore
+    else:
+        args = option_values(analyzer, history, artists=artists)
+        with instrumentation.stage(f"compute {analyzer.name}"):
+            result = analyzer.compute(history, *args)
+    with instrumentation.stage(f"write {analyzer.name}"):
+        return _write_result(analyzer, history, result, args, output, write_csv=write_csv, dpi=dpi)
+
+
+def _write_result(
+    analyzer: Type[Analyzer],
+    history: Union[TrackTable, MergedHistory],
+    result: Any,
+    args: List[Any],
+    output: str,
+    *,
+    write_csv: bool,
+    dpi: int,
+) -> List[str]:
+    path = os.path.join(output, file_name(analyzer.name))
+    paths: List[str] = []
+
+    if issubclass(analyzer, TextAnalyzer):
+        with open(f"{path}.txt", "w", encoding="utf-8") as file:
+            file.write(result + "\n")
+        paths.append(f"{path}.txt")
+        rows = (
+            analyzer.rows_merged(history.partials[analyzer.name], *args)
+            if isinstance(history, MergedHistory)
+            else analyzer.rows(history, *args)
+        )
+    else:
+        from analyzers.plotanalyzer import PlotAnalyzer  # pylint: disable=import-outside-toplevel
+
+        if not issubclass(analyzer, PlotAnalyzer):
+            raise ValueError(f"{analyzer.name!r} doesn't compute text or a plot")
+        subplot = analyzer.plot(result)
+        _save_png(analyzer, subplot, f"{path}.png", dpi=dpi)
+        paths.append(f"{path}.png")
+        rows = _plot_rows(subplot)
+
+    if write_csv:
+        if rows is None:
+            logger.warning("%r doesn't show a table, so no CSV was written", analyzer.name)
+        else:
+            with open(f"{path}.csv", "w", encoding="utf-8", newline="") as file:
+                csv.writer(file).writerows(rows)
+            paths.append(f"{path}.csv")
+    return paths
+
+
+def _save_png(analyzer: Any, subplot: Any, path: str, *, dpi: int) -> None:
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from analyzers.plotanalyzer import draw_subplot
+
+    width, height = analyzer.dim
+    figure = Figure(figsize=(width / 100, height / 100))
+    FigureCanvasAgg(figure)
+    draw_subplot(figure, subplot, analyzer.adjust)
+    figure.savefig(path, dpi=dpi)
+
+
+def _plot_rows(subplot: Any) -> Optional[Iterable[Sequence[Any]]]:
+    """The points of the lines a subplot draws, or None if it draws anything else"""
+    import matplotobjlib as plot  # pylint: disable=import-outside-toplevel
+
+    if not subplot.plotables or not all(isinstance(plotable, plot.Graph) for plotable in subplot.plotables):
+        return None
+    return [(graph.legend_label, x, y) for graph in subplot.plotables for x, y in zip(graph.x_values, graph.y_values)]
+
+
+@dataclasses.dataclass(frozen=True)
+class ReportOptions:
+    components: Tuple[str, ...] = ()
+    start: Optional[datetime.datetime] = None
+    end: Optional[datetime.datetime] = None
+    timezone: Optional[str] = None
+    artists: Optional[List[str]] = None
+    write_csv: bool = False
+    dpi: int = 200
+    config: str = "config.toml"
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "ReportOptions":
+        return cls(
+            components=tuple(args.component),
+            start=args.start,
+            end=args.end,
+            timezone=args.timezone,
+            artists=args.artists,
+            write_csv=args.csv,
+            dpi=args.dpi,
+            config=args.config,
+        )
+
+
+@dataclasses.dataclass
+class UserSummary:
+    """What a batch worker sends back about one user, which is all that's kept of their data once they're done"""
+
+    user: str
+    plays: int = 0
+    failed: bool = False
+    messages: List[str] = dataclasses.field(default_factory=list)
+    artist_listens: "collections.Counter[str]" = dataclasses.field(default_factory=collections.Counter)
+    artist_duration: "collections.Counter[str]" = dataclasses.field(default_factory=collections.Counter)
+    month_listens: "collections.Counter[str]" = dataclasses.field(default_factory=collections.Counter)
+    month_duration: "collections.Counter[str]" = dataclasses.field(default_factory=collections.Counter)
+
+    def add_totals(self, tracks: TrackTable) -> None:
+        cube = ListenCube.of(tracks)
+        by_artist = cube.rollup(cube.artist)
+        artists = tracks.artists[by_artist.keys[0]].tolist()
+        self.artist_listens.update(dict(zip(artists, by_artist.listens.tolist())))
+        self.artist_duration.update(dict(zip(artists, by_artist.duration.tolist())))
+        by_month = cube.rollup(cube.month)
+        months = by_month.keys[0].astype(str).tolist()
+        self.month_listens.update(dict(zip(months, by_month.listens.tolist())))
+        self.month_duration.update(dict(zip(months, by_month.duration.tolist())))
+
+
+def run_analyzers(
+    analyzers: Dict[str, Type[Analyzer]],
+    history: Union[TrackTable, MergedHistory],
+    output: str,
+    options: ReportOptions,
+    log: Callable[[str], None],
+) -> bool:
+    """Runs each of `analyzers` on `history`, returning whether any of them failed"""
+    os.makedirs(output, exist_ok=True)
+    failed = False
+    for name, analyzer in analyzers.items():
+        start = time.perf_counter()
+        try:
+            paths = run_analyzer(
+                analyzer,
+                history,
+                output,
+                write_csv=options.write_csv,
+                artists=options.artists,
+                dpi=options.dpi,
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception("Error running analyzer %r", name)
+            log(f"{name}: error: {err}")
+            failed = True
+        else:
+            log(f"{name}: {', '.join(paths)} in {time.perf_counter() - start:.2f}s")
+    return failed
+
+
+def report(args: argparse.Namespace) -> int:
+    options = ReportOptions.from_args(args)
+    config = Config.load(options.config)
+    if config.enable_logs:
+        utils.configure_logger("analyzer", "logs.txt")
+    instrumentation.trace_memory(config.trace_memory)
+    analyzers = analyzer_types(options.components, config)
+    try:
+        return _report(args, options, config, analyzers)
+    finally:
+        if args.stats:
+            with open(args.stats, "w", encoding="utf-8") as file:
+                json.dump(instrumentation.as_dict(instrumentation.RECORDER.totals()), file, indent=2)
+
+
+def _report(
+    args: argparse.Namespace, options: ReportOptions, config: Config, analyzers: Dict[str, Type[Analyzer]]
+) -> int:
+    start = time.perf_counter()
+    history: Union[TrackTable, MergedHistory]
+    filter_ = functools.partial(filter_tracks, start=options.start, end=options.end, timezone=options.timezone)
+    if over_memory_budget(args.directory, config):
+        errors: List[str] = []
+        with tempfile.TemporaryDirectory() as directory:
+            partitions = load_partitions(args.directory, directory, config, errors)
+            history = merge_partitions(analyzers, partitions, filter_)
+        loaded, plays = history.loaded, history.plays
+        print(
+            f"Read the history a month at a time, {len(partitions.months())} months, to stay within the memory budget"
+        )
+    else:
+        result = load_tracks(
+            args.directory,
+            cache_directory=config.cache_directory,
+            workers=config.load_workers,
+            streaming=config.streaming_ingest,
+            store_path=config.store_path,
+        )
+        errors = result.errors
+        history = filter_(result.tracks)
+        loaded, plays = len(result.tracks), len(history)
+    for error in errors:
+        print(f"Error loading tracks file: {error}", file=sys.stderr)
+    print(f"Loaded {loaded:,d} plays, {plays:,d} after filtering, in {time.perf_counter() - start:.2f}s")
+    if not plays:
+        print("No plays to analyze", file=sys.stderr)
+        return 1
+
+    return 1 if run_analyzers(analyzers, history, args.output, options, print) else 0
+
+
+def over_memory_budget(path: str, config: Config) -> bool:
+    """Whether the streaming history files under `path` are bigger than the memory budget, if there is one"""
+    if config.memory_budget_mb is None or config.store_path is not None:
+        return False
+    size = sum(os.path.getsize(file_path) for file_path in find_tracks_files(path))
+    return size > config.memory_budget_mb * 2**20
+
+
+def report_user(user: str, directory: str, output: str, options: ReportOptions) -> UserSummary:
+    """Reports on one user in a batch, in a worker process"""
+    summary = UserSummary(user)
+    try:
+        config = Config.load(options.config)
+        analyzers = analyzer_types(options.components, config)
+        # Each user already has a process to themselves, so their files are loaded one at a time
+        loaded = load_tracks(directory, cache_directory=config.cache_directory, streaming=config.streaming_ingest)
+        summary.messages.extend(f"Error loading tracks file: {error}" for error in loaded.errors)
+        tracks = filter_tracks(loaded.tracks, start=options.start, end=options.end, timezone=options.timezone)
+        del loaded
+        summary.plays = len(tracks)
+        if not len(tracks):  # pylint: disable=len-as-condition
+            summary.messages.append("No plays to analyze")
+            return summary
+        summary.failed = run_analyzers(analyzers, tracks, output, options, summary.messages.append)
+        summary.add_totals(tracks)
+    except Exception as err:  # pylint: disable=broad-except
+        logger.exception("Error reporting on user %r", user)
+        summary.messages.append(f"error: {err}")
+        summary.failed = True
+    return summary
+
+
+def batch(args: argparse.Namespace) -> int:
+    options = ReportOptions.from_args(args)
+    config = Config.load(options.config)
+    if config.enable_logs:
+        utils.configure_logger("analyzer", "logs.txt")
+    # Checked up front so a misspelled analyzer doesn't fail every user
+    analyzer_types(options.components, config)
+
+    users = sorted(entry.name for entry in os.scandir(args.root) if entry.is_dir())
+    if not users:
+        print(f"No user folders in {args.root!r}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    total = UserSummary("all users")
+    artist_users: "collections.Counter[str]" = collections.Counter()
+    failed: List[str] = []
+    queued = collections.deque(users)
+    pending: Dict[concurrent.futures.Future, str] = {}
+    done = 0
+    executor = concurrent.futures.ProcessPoolExecutor(args.processes)
+    try:
+        # Only a few users are queued ahead of the workers, and each summary is added to the totals and dropped as soon
+        # as it comes back, so memory doesn't grow with the number of users
+        while queued or pending:
+            while queued and len(pending) < 2 * args.processes:
+                user = queued.popleft()
+                report_args = (user, os.path.join(args.root, user), os.path.join(args.output, user), options)
+                try:
+                    future = executor.submit(report_user, *report_args)
+                except concurrent.futures.BrokenExecutor:
+                    # A worker died, which fails the users the pool had and stops it, so the rest get a new one
+                    executor.shutdown(wait=False)
+                    executor = concurrent.futures.ProcessPoolExecutor(args.processes)
+                    future = executor.submit(report_user, *report_args)
+                pending[future] = user
+            finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                user = pending.pop(future)
+                try:
+                    summary = future.result()
+                except Exception as err:  # pylint: disable=broad-except
+                    logger.exception("Error reporting on user %r", user)
+                    summary = UserSummary(user, failed=True, messages=[f"error: {err}"])
+                done += 1
+                print(f"[{done}/{len(users)}] {summary.user}: {summary.plays:,d} plays")
+                for message in summary.messages:
+                    print(f"    {message}")
+                if summary.failed:
+                    failed.append(summary.user)
+                total.plays += summary.plays
+                for counter in ("artist_listens", "artist_duration", "month_listens", "month_duration"):
+                    getattr(total, counter).update(getattr(summary, counter))
+                artist_users.update(summary.artist_listens.keys())
+    finally:
+        executor.shutdown()
+
+    paths = write_summary(total, artist_users, len(users), failed, args.output, write_csv=options.write_csv)
+    print(f"Summary: {', '.join(paths)}")
+    print(f"Reported on {len(users)} users in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+def write_summary(
+    total: UserSummary,
+    artist_users: "collections.Counter[str]",
+    users: int,
+    failed: Sequence[str],
+    output: str,
+    *,
+    write_csv: bool = False,
+) -> List[str]:
+    """Writes the listens of every user together, returning the paths of the files it was written to"""
+    artists = sorted(total.artist_listens, key=lambda artist: (-total.artist_listens[artist], artist))
+    months = sorted(total.month_listens, reverse=True)
+
+    sections = [f"{users} users, {total.plays:,d} plays" + (f", failed: {', '.join(failed)}" if failed else "")]
+    if artists:
+        artist_table = (
+            (
+                f"{artist}:",
+                f"{total.artist_listens[artist]} listens",
+                _duration(total.artist_duration[artist]),
+                f"{artist_users[artist]} users",
+            )
+            for artist in artists[:20]
+        )
+        sections.append("Top artists:\n" + utils.pformat_table(artist_table, justify="<", sep=" "))
+    if months:
+        month_table = (
+            (f"{_month_name(month)}:", f"{total.month_listens[month]} listens", _duration(total.month_duration[month]))
+            for month in months
+        )
+        sections.append("Monthly totals:\n" + utils.pformat_table(month_table, justify="<", sep=" "))
+
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, "summary")
+    with open(f"{path}.txt", "w", encoding="utf-8") as file:
+        file.write("\n\n".join(sections) + "\n")
+    paths = [f"{path}.txt"]
+    if write_csv:
+        with open(f"{path}_artists.csv", "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(
+                (artist, total.artist_listens[artist], total.artist_duration[artist], artist_users[artist])
+                for artist in artists
+            )
+        with open(f"{path}_months.csv", "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(
+                (month, total.month_listens[month], total.month_duration[month]) for month in months
+            )
+        paths.extend((f"{path}_artists.csv", f"{path}_months.csv"))
+    return paths
+
+
+def _duration(milliseconds: int) -> str:
+    hours, minutes, _ = utils.hours_minutes_seconds(datetime.timedelta(milliseconds=milliseconds))
+    return f"{hours} hours {minutes} minutes"
+
+
+def _month_name(month: str) -> str:
+    date = datetime.date.fromisoformat(f"{month}-01")
+    return f"{calendar.month_name[date.month]} {date.year:d}"
+
+
+def import_history(args: argparse.Namespace) -> int:
+    config = Config.load(args.config)
+    start = time.perf_counter()
+    with HistoryStore(args.database) as store:
+        before = len(store)
+        for file_path in find_tracks_files(args.directory):
+            try:
+                store.import_file(
+                    file_path,
+                    functools.partial(
+                        load_tracks_file, cache_directory=config.cache_directory, streaming=config.streaming_ingest
+                    ),
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                logger.exception("Error importing %r", file_path)
+                print(f"Error importing tracks file {os.path.basename(file_path)!r}: {err}", file=sys.stderr)
+        after = len(store)
+    print(
+        f"Imported {after - before:,d} new plays into {args.database!r}, {after:,d} in all, in {time.perf_counter() - start:.2f}s"
+    )
+    return 0
+
+
+def query(args: argparse.Namespace) -> int:
+    start_ms = to_ms(args.start) if args.start else None
+    end_ms = to_ms(args.end) if args.end else None
+    rows: Sequence[Sequence[Any]]
+    table: List[Sequence[Any]]
+    with HistoryStore(args.database) as store:
+        if args.query == "monthly":
+            rows = store.monthly_listens(start_ms, end_ms)
+            table = [
+                (f"{_month_name(month)}:", f"{listens} listens", _duration(duration))
+                for month, listens, duration in rows
+            ]
+        elif args.query == "top-listens":
+            rows = store.top_artists("listens", start_ms, end_ms, limit=args.limit)
+            table = [(f"{artist}:", listens) for artist, listens in rows]
+        else:
+            rows = store.top_artists("duration", start_ms, end_ms, limit=args.limit)
+            table = [(f"{artist}:", _duration(duration)) for artist, duration in rows]
+    if args.csv:
+        csv.writer(sys.stdout).writerows(rows)
+    elif table:
+        print(utils.pformat_table(table, justify="<", sep=" "))
+    return 0
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive number, not {value}")
+    return number
+
+
+def _add_report_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-o", "--output", default="reports", help="folder to write to (default: %(default)s)")
+    parser.add_argument(
+        "-c", "--component", action="append", default=[], help="analyzer to run, by name (default: all of them)"
+    )
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat, help="include plays from this date or time")
+    parser.add_argument("--end", type=datetime.datetime.fromisoformat, help="include plays up to this date or time")
+    parser.add_argument(
+        "--timezone",
+        default=str(tzlocal.get_localzone()),
+        help="timezone to show listens in, or '' to leave them as recorded (default: %(default)s)",
+    )
+    parser.add_argument("--artists", nargs="+", help="artists for analyzers that plot chosen artists")
+    parser.add_argument("--csv", action="store_true", help="also write tables and plotted data as CSV")
+    parser.add_argument("--dpi", type=int, default=200, help="resolution of plots (default: %(default)s)")
+    parser.add_argument("--config", default="config.toml", help="config file (default: %(default)s)")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="analyzer", description="Analyzes Spotify listening history without a window")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = commands.add_parser("report", help="write the results of analyzers to files")
+    report_parser.add_argument("directory", help="folder containing Spotify data")
+    _add_report_arguments(report_parser)
+    report_parser.add_argument("--stats", help="file to save the time and memory each stage took to, as JSON")
+    report_parser.set_defaults(run=report)
+
+    batch_parser = commands.add_parser(
+        "batch", help="report on every user in a folder, with a summary of all of them together"
+    )
+    batch_parser.add_argument("root", help="folder containing a folder of Spotify data for each user")
+    _add_report_arguments(batch_parser)
+    batch_parser.add_argument(
+        "-p",
+        "--processes",
+        type=_positive_int,
+        default=os.cpu_count() or 1,
+        help="users to report on at once (default: %(default)s)",
+    )
+    batch_parser.set_defaults(run=batch)
+
+    import_parser = commands.add_parser("import", help="add Spotify data to a history database")
+    import_parser.add_argument("database", help="SQLite database to add to, which is created if it doesn't exist")
+    import_parser.add_argument("directory", help="folder containing Spotify data")
+    import_parser.add_argument("--config", default="config.toml", help="config file (default: %(default)s)")
+    import_parser.set_defaults(run=import_history)
+
+    query_parser = commands.add_parser("query", help="total up the listens in a history database")
+    query_parser.add_argument("database", help="SQLite database made by the import command")
+    query_parser.add_argument("query", choices=("top-listens", "top-duration", "monthly"), help="what to total")
+    query_parser.add_argument(
+        "--start", type=datetime.datetime.fromisoformat, help="include plays from this date or time"
+    )
+    query_parser.add_argument(
+        "--end", type=datetime.datetime.fromisoformat, help="include plays up to this date or time"
+    )
+    query_parser.add_argument("--limit", type=int, default=20, help="number of top artists (default: %(default)s)")
+    query_parser.add_argument("--csv", action="store_true", help="write CSV instead of a table")
+    query_parser.set_defaults(run=query)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+from typing import Any
+
+from analyzers.analyzer import Analyzer
+from analyzers.textanalyzer import TextAnalyzer
+
+# The built in analyzers by name, which are only imported once they're needed
+ANALYZERS = {
+    "Listens Per Day": "analyzers.artistsplot:ArtistsPlot",
+    "Monthly Listens": "analyzers.monthlylistens:MonthlyListens",
+    "Top Artists by Listen Duration": "analyzers.topartists:TopArtistsByDuration",
+    "Top Artists by Listens": "analyzers.topartists:TopArtistsByListens",
+    "Total Tracks": "analyzers.totaltracks:TotalTracks",
+    "Weekly Color Mesh": "analyzers.weeklycolormesh:WeeklyColorMesh",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # Importing PlotAnalyzer imports matplotlib, which is left until something that plots is needed
+    if name == "PlotAnalyzer":
+        from analyzers.plotanalyzer import PlotAnalyzer  # pylint: disable=import-outside-toplevel
+
+        return PlotAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
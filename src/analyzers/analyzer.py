@@ -0,0 +1,30 @@
+import abc
+from typing import Any, Sequence
+
+from analyzers.options import Option
+from tracktable import TrackTable
+
+
+class Analyzer(metaclass=abc.ABCMeta):
+    """
+    What an analysis of the listening history computes, apart from the widgets that show it
+
+    Analyzers are never instantiated, and everything they do is a classmethod, so the window can run them on a
+    background thread and reports can run them without a window. `compute` is given the tracks and a value for each of
+    `options`.
+
+    Analyzers with `supports_partials` can analyze a history a partition at a time, for reports on histories bigger
+    than memory. They implement `partial(tracks, first_row)`, which is what they need from one partition where
+    `first_row` is the row it starts at, `merge(partials)`, which combines those, and `compute_merged(partial, *args)`,
+    which computes the result from the merged partial like `compute` does from the whole history.
+    """
+
+    name: str
+    dim = (600, 400)
+    options: Sequence[Option] = tuple()
+    supports_partials = False
+
+    @classmethod
+    @abc.abstractmethod
+    def compute(cls, tracks: TrackTable, *args: Any) -> Any:
+        return NotImplemented
@@ -0,0 +1,53 @@
+from typing import List, Optional, Sequence
+
+import matplotobjlib as plot
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+
+import utils
+from analyzers.options import Artists, Spinbox
+from analyzers.plotanalyzer import PlotAnalyzer
+from cube import DailyListens
+from tracktable import TrackTable
+
+
+class ArtistsPlot(PlotAnalyzer):
+    name = "Listens Per Day"
+    options = [
+        Artists(),
+        Spinbox(text="Moving average days: ", from_=1, to=14, default=7),
+        Spinbox(text="Moving average kernel: ", values=utils.KERNELS, default="box"),
+    ]
+
+    @classmethod
+    def compute(cls, all_tracks: TrackTable, artists: List[str], smoothing: int, kernel: str) -> plot.SubPlot:  # type: ignore # pylint: disable=arguments-differ
+        daily_listens = DailyListens.of(all_tracks)
+        days = daily_listens.days.tolist()
+        averages = utils.moving_average(daily_listens.series(artists), smoothing, kernel)
+
+        return plot.SubPlot(
+            *(
+                plot.Graph(
+                    x_values=days,
+                    y_values=series,
+                    legend_label=artist,
+                    plot_type="-",
+                )
+                for artist, series in zip(artists, averages)
+            )
+        )
+
+    @classmethod
+    def update_plot(cls, axes: Axes, current: plot.SubPlot, new: plot.SubPlot) -> Optional[Sequence[Artist]]:
+        lines = axes.get_lines()
+        labels = [graph.legend_label for graph in new.plotables]
+        if len(lines) != len(new.plotables) or labels != [graph.legend_label for graph in current.plotables]:
+            return None
+        if new.plotables and new.plotables[0].x_values != current.plotables[0].x_values:
+            return None
+
+        for line, graph in zip(lines, new.plotables):
+            line.set_ydata(graph.y_values)
+        axes.relim()
+        axes.autoscale_view()
+        return lines
@@ -0,0 +1,46 @@
+import calendar
+import dataclasses
+import datetime
+from typing import Iterator, Sequence, Tuple
+
+import utils
+from analyzers.textanalyzer import TextAnalyzer
+from cube import ListenCube, Rollup
+from tracktable import TrackTable
+
+
+class MonthlyListens(TextAnalyzer):
+    name = "Monthly Listens"
+    supports_partials = True
+
+    @classmethod
+    def compute(cls, tracks: TrackTable) -> str:  # type: ignore # pylint: disable=arguments-differ
+        return cls.compute_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def rows(cls, tracks: TrackTable) -> Iterator[Tuple[str, int, int]]:  # type: ignore # pylint: disable=arguments-differ
+        return cls.rows_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def partial(cls, tracks: TrackTable, first_row: int) -> Rollup:
+        cube = ListenCube.of(tracks)
+        months = cube.rollup(cube.month)
+        return dataclasses.replace(months, first_row=months.first_row + first_row)
+
+    @classmethod
+    def merge(cls, partials: Sequence[Rollup]) -> Rollup:
+        return Rollup.merge(partials)
+
+    @classmethod
+    def compute_merged(cls, partial: Rollup) -> str:  # type: ignore # pylint: disable=arguments-differ
+        month_table = (
+            (f"{month}:", f"{hours} hours", f"{minutes} minutes") for month, hours, minutes in cls.rows_merged(partial)
+        )
+        return utils.pformat_table(month_table, justify="<", sep=" ")
+
+    @classmethod
+    def rows_merged(cls, partial: Rollup) -> Iterator[Tuple[str, int, int]]:  # type: ignore # pylint: disable=arguments-differ
+        dates = partial.keys[0].astype("datetime64[D]").tolist()
+        for date, duration in zip(reversed(dates), partial.duration[::-1]):
+            hours, minutes, _ = utils.hours_minutes_seconds(datetime.timedelta(milliseconds=int(duration)))
+            yield f"{calendar.month_name[date.month]} {date.year:d}", hours, minutes
@@ -0,0 +1,100 @@
+"""
+The options of analyzers, which the window shows as widgets and reports use the default values of
+
+The widgets are only imported when an option is shown, so analyzers can be imported without tkinter.
+"""
+# pylint: disable=import-outside-toplevel
+import colorsys
+from typing import TYPE_CHECKING, Any, List, Optional, Protocol, Sequence, Union
+
+from cube import DailyListens
+from tracktable import TrackTable
+
+if TYPE_CHECKING:
+    from matplotlib.colors import ListedColormap
+
+    from gui.options import OptionWidget
+    from type_hints import Parent
+
+DEFAULT_TOP_ARTISTS = 10
+DEFAULT_HUE = 240 / 360
+
+
+def hue_colormap(hue: float) -> "ListedColormap":
+    from matplotlib.colors import ListedColormap
+
+    return ListedColormap([colorsys.hsv_to_rgb(hue, saturation / 255, 1) for saturation in range(255)])
+
+
+def top_artists(tracks: TrackTable) -> List[str]:
+    return list(DailyListens.of(tracks).most_in_a_day())[:DEFAULT_TOP_ARTISTS]
+
+
+class Option(Protocol):
+    def __call__(self, parent: "Parent" = None) -> "OptionWidget":
+        ...
+
+    def default_value(self, tracks: TrackTable) -> Any:
+        ...
+
+
+class CheckButton:
+    def __init__(self, text: str):
+        self._text = text
+
+    def __call__(self, parent: "Parent" = None) -> "OptionWidget":
+        from gui.options import CheckButtonWidget
+
+        return CheckButtonWidget(parent, text=self._text)
+
+    def default_value(self, _tracks: TrackTable) -> bool:
+        return False
+
+
+class Spinbox:
+    def __init__(
+        self,
+        *,
+        text: str,
+        default: Union[int, str],
+        from_: int = 0,
+        to: int = 0,
+        values: Optional[Sequence[str]] = None,
+    ):
+        self._text = text
+        self._from = from_
+        self._to = to
+        self._default = default
+        self._values = values
+
+    def __call__(self, parent: "Parent" = None) -> "OptionWidget":
+        from gui.options import SpinboxWidget
+
+        return SpinboxWidget(
+            parent, text=self._text, from_=self._from, to=self._to, default=self._default, values=self._values
+        )
+
+    def default_value(self, _tracks: TrackTable) -> Union[int, str]:
+        return self._default
+
+
+class Artists:
+    """A choice of artists, which starts as the ones with the most listens in a day"""
+
+    def __call__(self, parent: "Parent" = None) -> "OptionWidget":
+        from gui.options import ArtistChooser
+
+        return ArtistChooser(parent)
+
+    def default_value(self, tracks: TrackTable) -> List[str]:
+        return top_artists(tracks)
+
+
+class ColorMap:
+    def __call__(self, parent: "Parent" = None) -> "OptionWidget":
+        from gui.options import ColorMap as ColorMapWidget
+
+        return ColorMapWidget(parent)
+
+    def default_value(self, _tracks: TrackTable) -> "ListedColormap":
+        return hue_colormap(DEFAULT_HUE)
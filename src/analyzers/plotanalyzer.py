@@ -0,0 +1,41 @@
+import dataclasses
+from typing import Any, Optional, Sequence
+
+import matplotobjlib as plot
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+from analyzers.analyzer import Analyzer
+
+
+class PlotAnalyzer(Analyzer):
+    """
+    An analyzer that draws one subplot
+
+    `compute` can return any result that `plot` turns into a subplot, which by default is the result itself. Analyzers
+    can implement `update_plot` to change the data of a figure they've already drawn instead of having it rebuilt.
+    """
+
+    adjust = plot.SubplotsAdjust(left=0.07, right=0.975, top=0.975, bottom=0.08)
+
+    @classmethod
+    def plot(cls, result: Any) -> plot.SubPlot:
+        """The subplot that shows a result of `compute`"""
+        return result
+
+    @classmethod
+    def update_plot(cls, axes: Axes, current: Any, new: Any) -> Optional[Sequence[Artist]]:
+        """
+        Changes the artists that the `current` result drew on `axes` so that they show the `new` result instead
+
+        Returns the artists that changed, or None if the plot has to be rebuilt.
+        """
+        return None
+
+
+def draw_subplot(figure: Figure, subplot: plot.SubPlot, adjust: plot.SubplotsAdjust) -> None:
+    """Draws `subplot` as the only axes of `figure`"""
+    subplot.set_axis(figure.add_subplot(1, 1, 1))
+    subplot.draw()
+    figure.subplots_adjust(**dataclasses.asdict(adjust))
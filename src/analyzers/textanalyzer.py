@@ -0,0 +1,22 @@
+import abc
+from typing import Any, Iterable, Optional, Sequence
+
+from analyzers.analyzer import Analyzer
+from tracktable import TrackTable
+
+
+class TextAnalyzer(Analyzer):
+    @classmethod
+    @abc.abstractmethod
+    def compute(cls, tracks: TrackTable, *args: Any) -> str:
+        return NotImplemented
+
+    @classmethod
+    def rows(cls, tracks: TrackTable, *args: Any) -> Optional[Iterable[Sequence[Any]]]:
+        """The table `compute` shows, or None if it doesn't show one"""
+        return None
+
+    @classmethod
+    def rows_merged(cls, partial: Any, *args: Any) -> Optional[Iterable[Sequence[Any]]]:
+        """The table `compute_merged` shows, like `rows`"""
+        return None
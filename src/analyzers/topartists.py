@@ -0,0 +1,92 @@
+import dataclasses
+import datetime
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+
+import utils
+from analyzers.textanalyzer import TextAnalyzer
+from cube import ListenCube, Rollup
+from tracktable import TrackTable
+
+
+def _by_artist(tracks: TrackTable, first_row: int) -> Rollup:
+    cube = ListenCube.of(tracks)
+    by_artist = cube.rollup(cube.artist)
+    # Keyed by name, since each partition of a history has its own artist codes
+    return dataclasses.replace(
+        by_artist, keys=(tracks.artists[by_artist.keys[0]],), first_row=by_artist.first_row + first_row
+    )
+
+
+def _top_artists(by_artist: Rollup, field: str) -> Iterator[Tuple[str, int]]:
+    values = getattr(by_artist, field)
+    # Ties are broken by which artist was listened to first
+    for index in np.lexsort((by_artist.first_row, -values))[:20]:
+        yield by_artist.keys[0][index], int(values[index])
+
+
+class TopArtistsByListens(TextAnalyzer):
+    name = "Top Artists by Listens"
+    supports_partials = True
+
+    @classmethod
+    def compute(cls, tracks: TrackTable) -> str:  # type: ignore # pylint: disable=arguments-differ
+        return cls.compute_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def rows(cls, tracks: TrackTable) -> Iterator[Tuple[str, int]]:  # type: ignore # pylint: disable=arguments-differ
+        return cls.rows_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def partial(cls, tracks: TrackTable, first_row: int) -> Rollup:
+        return _by_artist(tracks, first_row)
+
+    @classmethod
+    def merge(cls, partials: Sequence[Rollup]) -> Rollup:
+        return Rollup.merge(partials)
+
+    @classmethod
+    def compute_merged(cls, partial: Rollup) -> str:  # type: ignore # pylint: disable=arguments-differ
+        return utils.pformat_table(
+            ((artist + ":", listens) for artist, listens in cls.rows_merged(partial)), justify="<", sep=" "
+        )
+
+    @classmethod
+    def rows_merged(cls, partial: Rollup) -> Iterator[Tuple[str, int]]:  # type: ignore # pylint: disable=arguments-differ
+        return _top_artists(partial, "listens")
+
+
+class TopArtistsByDuration(TextAnalyzer):
+    name = "Top Artists by Listen Duration"
+    supports_partials = True
+
+    @classmethod
+    def compute(cls, tracks: TrackTable) -> str:  # type: ignore # pylint: disable=arguments-differ
+        return cls.compute_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def rows(cls, tracks: TrackTable) -> Iterator[Tuple[str, int, int]]:  # type: ignore # pylint: disable=arguments-differ
+        return cls.rows_merged(cls.partial(tracks, 0))
+
+    @classmethod
+    def partial(cls, tracks: TrackTable, first_row: int) -> Rollup:
+        return _by_artist(tracks, first_row)
+
+    @classmethod
+    def merge(cls, partials: Sequence[Rollup]) -> Rollup:
+        return Rollup.merge(partials)
+
+    @classmethod
+    def compute_merged(cls, partial: Rollup) -> str:  # type: ignore # pylint: disable=arguments-differ
+        duration_table = (
+            (artist + ":", f"{hours} hours", f"{minutes} minutes")
+            for artist, hours, minutes in cls.rows_merged(partial)
+        )
+        return utils.pformat_table(duration_table, justify="<", sep=" ")
+
+    @classmethod
+    def rows_merged(cls, partial: Rollup) -> Iterator[Tuple[str, int, int]]:  # type: ignore # pylint: disable=arguments-differ
+        for artist, duration in _top_artists(partial, "duration"):
+            hours, minutes, _ = utils.hours_minutes_seconds(datetime.timedelta(milliseconds=duration))
+            yield artist, hours, minutes
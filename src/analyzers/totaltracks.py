@@ -0,0 +1,13 @@
+from analyzers.textanalyzer import TextAnalyzer
+from tracktable import TrackTable, from_ms
+
+
+class TotalTracks(TextAnalyzer):
+    name = "Total Tracks"
+
+    @classmethod
+    def compute(cls, tracks: TrackTable) -> str:  # type: ignore # pylint: disable=arguments-differ
+        if not len(tracks):  # pylint: disable=len-as-condition
+            return "0 tracks listened to"
+        first, last = from_ms(tracks.start[0]).date(), from_ms(tracks.end[-1]).date()
+        return f"{len(tracks):,d} tracks listened to between {first} and {last}"
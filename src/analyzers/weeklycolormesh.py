@@ -0,0 +1,70 @@
+import dataclasses
+from typing import Optional, Sequence
+
+import matplotobjlib as plot
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+from matplotlib.colors import ListedColormap
+
+from analyzers.options import ColorMap
+from analyzers.plotanalyzer import PlotAnalyzer
+from cube import ListenCube
+from tracktable import TrackTable
+
+
+@dataclasses.dataclass(frozen=True)
+class Mesh:
+    values: np.ndarray  # Listens in each hour of each day of the week, from Saturday
+    color_map: ListedColormap
+
+
+class WeeklyColorMesh(PlotAnalyzer):
+    name = "Weekly Color Mesh"
+    supports_partials = True
+    adjust = plot.SubplotsAdjust(left=0.12, right=0.975, top=0.975, bottom=0.09)
+
+    options = (ColorMap(),)
+
+    @classmethod
+    def compute(cls, tracks: TrackTable, color_map: ListedColormap) -> Mesh:  # type: ignore # pylint: disable=arguments-differ
+        return cls.compute_merged(cls.partial(tracks, 0), color_map)
+
+    @classmethod
+    def partial(cls, tracks: TrackTable, _first_row: int) -> np.ndarray:
+        cube = ListenCube.of(tracks)
+        values = np.zeros((7, 24), dtype=np.int64)
+        np.add.at(values, (-(cube.weekday() - 5) % 7, (cube.hour_of_day() - 1) % 24), cube.listens)
+        return values
+
+    @classmethod
+    def merge(cls, partials: Sequence[np.ndarray]) -> np.ndarray:
+        return np.sum(partials, axis=0)
+
+    @classmethod
+    def compute_merged(cls, partial: np.ndarray, color_map: ListedColormap) -> Mesh:  # type: ignore # pylint: disable=arguments-differ
+        return Mesh(partial, color_map)
+
+    @classmethod
+    def plot(cls, result: Mesh) -> plot.SubPlot:
+        return plot.SubPlot(
+            plot.Colormesh(result.values, result.color_map),
+            x_tick_options=plot.TickOptions(
+                labels=[f"{i+1}\nam" for i in range(11)] + ["12\npm"] + [f"{i+1}\npm" for i in range(11)] + ["12\nam"],
+                values=[i + 0.5 for i in range(24)],
+            ),
+            y_tick_options=plot.TickOptions(
+                labels=["Saturday", "Friday", "Thursday", "Wednesday", "Tuesday", "Monday", "Sunday"],
+                values=[i + 0.5 for i in range(7)],
+            ),
+        )
+
+    @classmethod
+    def update_plot(cls, axes: Axes, current: Mesh, new: Mesh) -> Optional[Sequence[Artist]]:
+        if new.values.shape != current.values.shape:
+            return None
+        mesh = axes.collections[0]
+        mesh.set_array(new.values.ravel())
+        mesh.set_cmap(new.color_map)
+        mesh.autoscale()
+        return [mesh]
@@ -0,0 +1,254 @@
+"""
+Times each stage of loading and analyzing a made up history, without a window, and compares the results of runs
+
+    python src/benchmark.py run --scale 1m --output results.json
+    python src/benchmark.py compare baseline.json results.json --threshold 1.25
+    python src/benchmark.py ingest <directory>
+
+Each stage runs `--repeat` times on fresh copies of its input, so nothing it caches is reused, and the fastest run is
+kept. It then runs once more under tracemalloc to find the most memory it had allocated at once. Results are saved as
+JSON along with the scale and versions they were measured with. `ingest` compares the peak RSS of the buffered and
+streaming ingest paths on a folder of Spotify data.
+"""
+import argparse
+import concurrent.futures
+import dataclasses
+import datetime
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from backports import zoneinfo
+
+import analyzer
+import synthetic
+import utils
+from config import Config
+from cube import DailyListens, ListenCube
+from ingest import find_tracks_files, load_tracks, load_tracks_file, peak_rss
+from tracktable import TrackTable, TrackView
+
+_FORMAT = 1
+
+
+@dataclasses.dataclass
+class Result:
+    name: str
+    seconds: float
+    runs: List[float]
+    peak_bytes: int
+
+
+def measure(name: str, run: Callable[[Any], Any], setup: Callable[[], Any] = lambda: None, repeat: int = 3) -> Result:
+    """Times `run` on what `setup` returns, which isn't timed, keeping the fastest of `repeat` runs"""
+    runs = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        run(argument)
+        runs.append(time.perf_counter() - start)
+        del argument
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result = Result(name, min(runs), runs, peak)
+    print(f"{name}: {result.seconds:.4f}s, peak {result.peak_bytes / 2 ** 20:.1f} MiB")
+    return result
+
+
+def _copy(tracks: TrackTable) -> TrackTable:
+    # A new table has none of the cubes, time indexes and timezone conversions cached for the original
+    return dataclasses.replace(tracks)
+
+
+def benchmark(directory: str, *, repeat: int = 3) -> List[Result]:
+    tracks = load_tracks(directory).tracks
+    middle = int(tracks.start[len(tracks) // 4]), int(tracks.end[3 * len(tracks) // 4])
+    results = [
+        measure("load_tracks", lambda _: load_tracks(directory), repeat=repeat),
+        measure("load_tracks streaming", lambda _: load_tracks(directory, streaming=True), repeat=repeat),
+        measure(
+            "filter date range",
+            lambda table: TrackView(table).between(*middle).table,
+            lambda: _copy(tracks),
+            repeat=repeat,
+        ),
+        measure(
+            "filter timezone",
+            lambda table: TrackView(table).to_timezone(zoneinfo.ZoneInfo("America/New_York")).table,
+            lambda: _copy(tracks),
+            repeat=repeat,
+        ),
+        measure("listen cube", ListenCube.build, lambda: _copy(tracks), repeat=repeat),
+        measure("listens_per_day", DailyListens.of, lambda: _copy(tracks), repeat=repeat),
+    ]
+
+    daily_listens = DailyListens.of(tracks)
+    series = daily_listens.series(list(daily_listens.most_in_a_day())[:10])
+    for kernel in utils.KERNELS:
+        results.append(
+            measure(
+                f"moving_average {kernel}",
+                lambda values: utils.moving_average(values, 7, kernel),  # pylint: disable=cell-var-from-loop
+                lambda: series,
+                repeat=repeat,
+            )
+        )
+
+    for name, analyzer_type in analyzer.analyzer_types((), Config()).items():
+        args = analyzer.option_values(analyzer_type, tracks)
+        results.append(
+            measure(
+                f"component {name}",
+                lambda table: analyzer_type.compute(table, *args),  # pylint: disable=cell-var-from-loop
+                lambda: _copy(tracks),
+                repeat=repeat,
+            )
+        )
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    plays, artists = synthetic.SCALES[args.scale]
+    plays, artists = args.plays or plays, args.artists or artists
+    with tempfile.TemporaryDirectory() as directory:
+        if args.data is None:
+            start = time.perf_counter()
+            synthetic.write_history(directory, plays, artists, seed=args.seed)
+            print(f"Wrote {plays:,d} plays by {artists:,d} artists in {time.perf_counter() - start:.2f}s")
+        results = benchmark(args.data or directory, repeat=args.repeat)
+
+    report = {
+        "format": _FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "data": args.data or {"plays": plays, "artists": artists, "seed": args.seed},
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "peak_rss": peak_rss(),
+        "results": [dataclasses.asdict(result) for result in results],
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved results to {args.output!r}")
+    return 0
+
+
+def regressions(
+    baseline: Dict[str, Any], results: Dict[str, Any], threshold: float, min_seconds: float = 0
+) -> List[str]:
+    """
+    The stages of `results` that took more than `threshold` times as long as they did in `baseline`
+
+    Stages that took less than `min_seconds` both times are left out, since timings that short are mostly noise.
+    """
+    before = {result["name"]: result["seconds"] for result in baseline["results"]}
+    return [
+        result["name"]
+        for result in results["results"]
+        if result["name"] in before
+        and result["seconds"] > threshold * before[result["name"]]
+        and max(result["seconds"], before[result["name"]]) >= min_seconds
+    ]
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.results, encoding="utf-8") as file:
+        results = json.load(file)
+    if baseline["data"] != results["data"]:
+        print(f"Warning: comparing runs on different data, {baseline['data']} and {results['data']}", file=sys.stderr)
+
+    before = {result["name"]: result for result in baseline["results"]}
+    table = [("stage", "before", "after", "change", "peak before", "peak after")]
+    for result in results["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        table.append(
+            (
+                result["name"],
+                f"{old['seconds']:.4f}s",
+                f"{result['seconds']:.4f}s",
+                f"{result['seconds'] / old['seconds']:.2f}x" if old["seconds"] else "-",
+                f"{old['peak_bytes'] / 2 ** 20:.1f} MiB",
+                f"{result['peak_bytes'] / 2 ** 20:.1f} MiB",
+            )
+        )
+    print(utils.pformat_table(table, justify="<", sep="  "))
+
+    slower = regressions(baseline, results, args.threshold, args.min_seconds)
+    if slower:
+        print(f"Slower than {args.threshold:g}x the baseline: {', '.join(slower)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _load_peak(directory: str, streaming: bool) -> Tuple[int, float, Optional[int]]:
+    start = time.perf_counter()
+    plays = sum(len(load_tracks_file(path, streaming=streaming)) for path in find_tracks_files(directory))
+    return plays, time.perf_counter() - start, peak_rss()
+
+
+def ingest(args: argparse.Namespace) -> int:
+    # Each ingest path runs in a fresh process, so their peak RSS is separate
+    for streaming in (False, True):
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            plays, seconds, rss = executor.submit(_load_peak, args.directory, streaming).result()
+        rss_str = "unknown" if rss is None else f"{rss / 2 ** 20:.1f} MiB"
+        print(f"{'streaming' if streaming else 'buffered'}: {plays:,d} plays in {seconds:.2f}s, peak RSS {rss_str}")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmark", description="Benchmarks loading and analyzing history")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time each stage on a made up history and save the results")
+    run_parser.add_argument("-o", "--output", default="benchmark.json", help="file to save to (default: %(default)s)")
+    run_parser.add_argument(
+        "--scale", choices=synthetic.SCALES, default="10k", help="plays and artists to make up (default: %(default)s)"
+    )
+    run_parser.add_argument("--plays", type=int, help="number of plays, instead of the scale's")
+    run_parser.add_argument("--artists", type=int, help="number of artists, instead of the scale's")
+    run_parser.add_argument("--seed", type=int, default=0, help="seed of the history (default: %(default)s)")
+    run_parser.add_argument("--data", help="folder of Spotify data to use instead of a made up history")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs of each stage (default: %(default)s)")
+    run_parser.set_defaults(run=run)
+
+    compare_parser = commands.add_parser("compare", help="compare saved results, failing if any stage got slower")
+    compare_parser.add_argument("baseline", help="results to compare against")
+    compare_parser.add_argument("results", help="results to check")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=1.25, help="how many times slower a stage can get (default: %(default)s)"
+    )
+    compare_parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.001,
+        help="ignore stages that took less than this both times (default: %(default)s)",
+    )
+    compare_parser.set_defaults(run=compare)
+
+    ingest_parser = commands.add_parser("ingest", help="compare the peak memory of the buffered and streaming ingest")
+    ingest_parser.add_argument("directory", help="folder containing Spotify data")
+    ingest_parser.set_defaults(run=ingest)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,13 @@ logger = logging.getLogger(f"analyzer.{__name__}")
 class Config:
     component_directory: Optional[str] = None
     enable_logs: Optional[bool] = False
+    cache_directory: Optional[str] = None
+    load_workers: int = 1
+    streaming_ingest: bool = False
+    result_cache_mb: int = 64
+    store_path: Optional[str] = None
+    memory_budget_mb: Optional[int] = None
+    trace_memory: bool = False
 
     @classmethod
     def load(cls, path: str) -> "Config":
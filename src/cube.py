@@ -0,0 +1,174 @@
+import dataclasses
+import functools
+import threading
+import weakref
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+import utils
+from tracktable import TrackTable
+
+_cubes: "weakref.WeakKeyDictionary[TrackTable, ListenCube]" = weakref.WeakKeyDictionary()
+_cubes_lock = threading.Lock()
+
+
+def _groups(keys: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """The order that sorts rows by `keys` and the positions in that order where each distinct key starts"""
+    order = np.lexsort(keys[::-1])
+    changes = np.zeros(len(order), dtype=bool)
+    changes[:1] = True
+    for key in keys:
+        sorted_key = key[order]
+        changes[1:] |= sorted_key[1:] != sorted_key[:-1]
+    return order, np.flatnonzero(changes)
+
+
+@dataclasses.dataclass(frozen=True)
+class Rollup:
+    keys: Tuple[np.ndarray, ...]
+    listens: np.ndarray
+    duration: np.ndarray
+    first_row: np.ndarray
+
+    @classmethod
+    def merge(cls, rollups: Sequence["Rollup"]) -> "Rollup":
+        """Sums rollups of different plays by key, giving the rollup of all of those plays together"""
+        keys = tuple(np.concatenate(key) for key in zip(*(rollup.keys for rollup in rollups)))
+        order, starts = _groups(keys)
+        return Rollup(
+            keys=tuple(key[order][starts] for key in keys),
+            listens=np.add.reduceat(np.concatenate([rollup.listens for rollup in rollups])[order], starts),
+            duration=np.add.reduceat(np.concatenate([rollup.duration for rollup in rollups])[order], starts),
+            first_row=np.minimum.reduceat(np.concatenate([rollup.first_row for rollup in rollups])[order], starts),
+        )
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class ListenCube:
+    """
+    Listens and durations of a `TrackTable` aggregated by hour, day, month and artist
+
+    Only cells that were listened to are stored. Each play is pinned to its hour, day and month by
+    `utils.in_hours`, `utils.in_days` and `utils.in_months`, and since all three are part of a cell's key, rolling the cube
+    up to any of them gives exactly the same result as pinning each play.
+    """
+
+    hour: np.ndarray  # datetime64[h]
+    day: np.ndarray  # datetime64[D]
+    month: np.ndarray  # datetime64[M]
+    artist: np.ndarray
+    listens: np.ndarray
+    duration: np.ndarray
+    first_row: np.ndarray  # The first row of the table in each cell
+    artists: np.ndarray
+
+    @classmethod
+    def of(cls, tracks: TrackTable) -> "ListenCube":
+        """The cube of `tracks`, built the first time it's needed for that table"""
+        with _cubes_lock:
+            cube = _cubes.get(tracks)
+        if cube is None:
+            cube = cls.build(tracks)
+            with _cubes_lock:
+                _cubes[tracks] = cube
+        return cube
+
+    @classmethod
+    def build(cls, tracks: TrackTable) -> "ListenCube":
+        keys = (
+            utils.in_hours(tracks.start, tracks.end),
+            utils.in_days(tracks.start, tracks.end),
+            utils.in_months(tracks.start, tracks.end),
+            tracks.artist,
+        )
+        order, starts = _groups(keys)
+        hour, day, month, artist = (key[order][starts] for key in keys)
+        return ListenCube(
+            hour,
+            day,
+            month,
+            artist,
+            listens=np.diff(np.append(starts, len(order))),
+            duration=np.add.reduceat(tracks.duration[order].astype(np.int64), starts),
+            first_row=np.minimum.reduceat(order, starts),
+            artists=tracks.artists,
+        )
+
+    def rollup(self, *keys: np.ndarray) -> Rollup:
+        """Sums the cells with the same values of `keys`, which are aligned with the cells of this cube"""
+        order, starts = _groups(keys)
+        return Rollup(
+            keys=tuple(key[order][starts] for key in keys),
+            listens=np.add.reduceat(self.listens[order], starts),
+            duration=np.add.reduceat(self.duration[order], starts),
+            first_row=np.minimum.reduceat(self.first_row[order], starts),
+        )
+
+    @functools.cached_property
+    def daily_listens(self) -> "DailyListens":
+        by_artist_day = self.rollup(self.artist, self.day)
+        artists, days = by_artist_day.keys
+        first_day = days.min() if len(days) else np.datetime64(0, "D")
+        return DailyListens(
+            first_day=first_day,
+            length=int((days.max() - first_day).astype(np.int64)) + 1 if len(days) else 0,
+            artists=self.artists,
+            indptr=np.searchsorted(artists, np.arange(len(self.artists) + 1)),
+            day=(days - first_day).astype(np.int64),
+            listens=by_artist_day.listens,
+        )
+
+    def hour_of_day(self) -> np.ndarray:
+        return self.hour.astype(np.int64) % 24
+
+    def weekday(self) -> np.ndarray:
+        # The epoch was a Thursday
+        return (self.day.astype(np.int64) + 3) % 7
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class DailyListens:
+    """
+    Listens to each artist on each day, as a sparse matrix with a row for each artist and a column for each day
+
+    Row `artist` of the matrix is stored in `day[indptr[artist]:indptr[artist + 1]]` and the same slice of `listens`,
+    with days counted from `first_day`. Only the rows of the artists that are asked for are made dense.
+    """
+
+    first_day: np.datetime64
+    length: int
+    artists: np.ndarray
+    indptr: np.ndarray
+    day: np.ndarray
+    listens: np.ndarray
+
+    @classmethod
+    def of(cls, tracks: TrackTable) -> "DailyListens":
+        return ListenCube.of(tracks).daily_listens
+
+    @property
+    def days(self) -> np.ndarray:
+        """Every day from the first listen to the last, including days without any"""
+        return self.first_day + np.arange(self.length)
+
+    def series(self, artists: Sequence[str]) -> np.ndarray:
+        """The listens each day to each of `artists`, one row per artist, with zeros for artists that weren't played"""
+        series = np.zeros((len(artists), self.length), dtype=np.int64)
+        for row, artist in enumerate(artists):
+            code = self._codes.get(artist)
+            if code is not None:
+                cells = slice(self.indptr[code], self.indptr[code + 1])
+                series[row, self.day[cells]] = self.listens[cells]
+        return series
+
+    def most_in_a_day(self) -> Dict[str, int]:
+        """The most listens in a single day to each artist that was played, from most to least"""
+        played = np.flatnonzero(np.diff(self.indptr))
+        peaks = np.maximum.reduceat(self.listens, self.indptr[played]) if len(played) else self.listens
+        order = np.argsort(-peaks, kind="stable")
+        return dict(zip(self.artists[played[order]], peaks[order].tolist()))
+
+    @functools.cached_property
+    def _codes(self) -> Dict[str, int]:
+        return {artist: code for code, artist in enumerate(self.artists)}
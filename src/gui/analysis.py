@@ -1,27 +1,81 @@
+import dataclasses
+import functools
 import logging
+import math
+import time
 import tkinter as tk
 from tkinter import ttk
 from tkinter.messagebox import showerror, showwarning
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Type, Union
 
+import ingest
+import instrumentation
+import plugins
+from analyzers import ANALYZERS, Analyzer
 from config import Config
 from gui import utils
-from gui.components.artistsplot import ArtistsPlot
-from gui.components.component import Component
-from gui.components.monthlylistens import MonthlyListens
-from gui.components.topartists import TopArtistsByDuration, TopArtistsByListens
-from gui.components.totaltracks import TotalTracks
-from gui.components.weeklycolormesh import WeeklyColorMesh
+from gui.components import Component, analyzer_component
 from gui.filters import DateRangeFilter, Filter, FilterWidget, Timezone
 from gui.options import OptionWidget
-from track import Track
+from gui.worker import Job, Worker
+from resultcache import ResultCache, approximate_size
+from tracktable import TrackTable, TrackView
 from type_hints import Parent
 
 logger = logging.getLogger(f"analysis.{__name__}")
 
-COMPONENTS = (ArtistsPlot, MonthlyListens, TopArtistsByDuration, TopArtistsByListens, TotalTracks, WeeklyColorMesh)
 FILTERS: Tuple[Filter] = (DateRangeFilter, Timezone)
 
+_PARTIAL_INTERVAL = 1.0
+
+
+class ProgressWidget(ttk.Frame):
+    def __init__(self, parent: Parent):
+        super().__init__(parent)
+        self._message_var = tk.StringVar(self)
+        label = ttk.Label(self, textvariable=self._message_var)
+        self._progress_bar = ttk.Progressbar(self, maximum=1.0, length=100)
+        self.cancel_button = ttk.Button(self, text="Cancel")
+
+        label.pack(side=tk.TOP)
+        self._progress_bar.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.cancel_button.pack(side=tk.LEFT)
+
+    def show(self, fraction: float, message: str = "") -> None:
+        self._progress_bar.config(value=fraction)
+        self._message_var.set(message)
+        if not self.winfo_manager():
+            self.pack(fill=tk.X, padx=5, pady=5)
+
+    def hide(self) -> None:
+        self.pack_forget()
+
+
+class StagesWindow(tk.Toplevel):
+    """Shows how long each stage of loading and analyzing has taken in all, for finding out where the time goes"""
+
+    def __init__(self, parent: Parent):
+        super().__init__(parent)
+        self.title("Stages")
+        self._text = tk.Text(self, state="disabled", wrap=tk.NONE, width=100, height=24)
+        buttons = ttk.Frame(self)
+        ttk.Button(buttons, text="Refresh", command=self.refresh).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Reset", command=self._on_reset).pack(side=tk.LEFT)
+
+        buttons.pack(side=tk.BOTTOM, pady=5)
+        self._text.pack(expand=True, fill=tk.BOTH)
+        self.refresh()
+
+    def refresh(self) -> None:
+        self._text.configure(state="normal")
+        self._text.delete("1.0", tk.END)
+        self._text.insert("1.0", instrumentation.format_table(instrumentation.RECORDER.totals()))
+        self._text.configure(state="disabled")
+
+    def _on_reset(self) -> None:
+        instrumentation.RECORDER.reset()
+        self.refresh()
+
 
 class AnalysisWidgets(ttk.Frame):
     def __init__(self, parent: Parent):
@@ -35,6 +89,9 @@ class AnalysisWidgets(ttk.Frame):
         filters_seperator = ttk.Separator(self, orient=tk.VERTICAL)
         self._filters_seperator = ttk.Separator(self.filters_frame)
         self.analyze_button = ttk.Button(self.filters_frame, text="Analyze")
+        self._progress_frame = ttk.Frame(self.filters_frame)
+        self.load_progress = ProgressWidget(self._progress_frame)
+        self.analysis_progress = ProgressWidget(self._progress_frame)
 
         self.options_frame = ttk.Frame(self)
         options_label = ttk.Label(self.options_frame, text="Options", style="Subtitle.TLabel")
@@ -47,6 +104,10 @@ class AnalysisWidgets(ttk.Frame):
 
         self.analysis_frame = ttk.Frame(self)
 
+        self.status_var = tk.StringVar(self)
+        self.status_bar = ttk.Label(self, textvariable=self.status_var, anchor=tk.W, cursor="hand2")
+
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         self.options_frame.pack(side=tk.RIGHT, fill=tk.Y)
         options_label.pack(padx=30)
         self.pack_options()
@@ -81,6 +142,7 @@ class AnalysisWidgets(ttk.Frame):
     def pack_filters(self, *widgets: tk.Widget) -> None:
         self._filters_seperator.pack_forget()
         self.analyze_button.pack_forget()
+        self._progress_frame.pack_forget()
 
         for seperator in self._filters_seperators:
             seperator.destroy()
@@ -98,87 +160,312 @@ class AnalysisWidgets(ttk.Frame):
 
         self._filters_seperator.pack(fill=tk.X, padx=5, pady=5)
         self.analyze_button.pack(padx=30, anchor=tk.N)
+        self._progress_frame.pack(fill=tk.X)
+
+
+@dataclasses.dataclass(eq=False)
+class _PooledComponent:
+    """A component that's kept, hidden, while other analyzers are shown, along with its options"""
+
+    component: Component
+    options: List[OptionWidget]
+    tracks: Optional[TrackTable] = None  # The tracks the options were last given
+    shown: Optional[Hashable] = None  # What the component last showed the analysis of, see `Analysis._shown_state`
 
 
 class Analysis:
     def __init__(self, parent: Parent, *, config: Config):
         self.gui = AnalysisWidgets(parent)
 
-        self._tracks: Optional[List[Track]] = None
+        self._config = config
+        self._tracks: Optional[TrackTable] = None
+        self._view: Optional[TrackView] = None
+        self._worker = Worker(self.gui)
+        self._load_worker = Worker(self.gui)
+        self._results = ResultCache(config.result_cache_mb * 2**20)
         self._current_choice: Optional[str] = None
-        self._current_component: Optional[Component] = None
-        self._options: List[OptionWidget] = []
+        self._pool: Dict[str, _PooledComponent] = {}
         self._filters: List[FilterWidget] = []
-        self._component_map = {component.name: component for component in COMPONENTS}  # pylint: disable=no-member
+        # The built in analyzers are only imported once they're picked
+        self._component_map: Dict[str, Union[str, Type[Analyzer], Type[Component]]] = dict(ANALYZERS)
+        filter_types: List[Filter] = list(FILTERS)
         if config.component_directory is not None:
-            for component in utils.load_components(config.component_directory):
-                self._component_map[component.name] = component
+            for component in (
+                *plugins.load_plugins(config.component_directory, Analyzer),
+                *utils.load_components(config.component_directory),
+            ):
+                self._component_map[component.name] = component  # pylint: disable=no-member
+            filter_types.extend(utils.load_filters(config.component_directory))
         names = sorted(self._component_map.keys())
 
         self.gui.analyze_button.config(command=self._on_analyze)
+        self.gui.analysis_progress.cancel_button.config(command=self._on_cancel)
+        self.gui.load_progress.cancel_button.config(command=self._on_cancel_load)
         self.gui.choice_combo.config(values=names)
         self.gui.choice_combo.state(["readonly"])
         self.gui.choice_combo.bind("<<ComboboxSelected>>", self._on_select)
+        self.gui.status_bar.bind("<Button-1>", self._on_show_stages)
+        self._stages_window: Optional[StagesWindow] = None
 
         if self._component_map:
             self.gui.choice_var.set(names[0])
-            self._on_select()
+            # Creating the first component can import its plotting libraries, which can wait until the window is shown
+            self.gui.after_idle(self._on_select)
 
-        for filter_type in FILTERS:
+        for filter_type in filter_types:
             self._filters.append(filter_type(self.gui.filters_frame))
         self.gui.pack_filters(*self._filters)
 
     def _on_select(self, _event: Optional[tk.Event] = None) -> None:
         choice = self.gui.choice_var.get()
-        if choice != self._current_choice:
-            component_type = self._component_map[choice]
+        if choice == self._current_choice:
+            return
+        pooled = self._pool.get(choice)
+        if pooled is None:
             try:
-                width, height = component_type.dim
-                component = component_type(self.gui.analysis_frame, width=width, height=height)  # type: ignore
+                pooled = self._create(choice)
             except Exception as err:  # pylint: disable=broad-except
                 logger.exception("Error creating analyzer of type %r", choice)
                 showerror("Error", message=f"Error creating analyzer of type {choice!r}: {err}")
                 self.gui.choice_var.set(self._current_choice)  # type: ignore
-            else:
-                if self._current_component:
-                    self._current_component.destroy()
-
-                for widget in self._options:
-                    widget.destroy()
-                self._options.clear()
-
-                for option in component_type.options:
-                    widget = option(self.gui.options_frame)
-                    if self._tracks is not None:
-                        widget.set_tracks(self._tracks)
-                    self._options.append(widget)
-                self.gui.pack_options(*self._options)
-
-                component.pack(expand=True, fill=tk.BOTH)
-                self._last_choice = choice
-                self._current_component = component
-                self._on_analyze()
-                self._current_choice = choice
-                self._current_component = component
-
-                self.gui.update()
+                return
+            self._pool[choice] = pooled
+
+        self._on_cancel()
+        current = self._current
+        if current is not None:
+            current.component.pack_forget()
+            for widget in current.options:
+                widget.pack_forget()
+
+        if self._tracks is not None and pooled.tracks is not self._tracks:
+            self._set_options_tracks(pooled)
+        self.gui.pack_options(*pooled.options)
+        pooled.component.pack(expand=True, fill=tk.BOTH)
+        self._current_choice = choice
+        # Hidden components keep what they showed, so they're only analyzed again if that's out of date
+        if pooled.shown is None or pooled.shown != self._shown_state():
+            self._on_analyze()
+
+        self.gui.update()
+
+    def _create(self, choice: str) -> _PooledComponent:
+        entry = self._component_map[choice]
+        loaded: Union[Type[Analyzer], Type[Component]] = plugins.import_spec(entry) if isinstance(entry, str) else entry
+        component_type = analyzer_component(loaded) if issubclass(loaded, Analyzer) else loaded
+        self._component_map[choice] = component_type
+        width, height = component_type.dim
+        component = component_type(self.gui.analysis_frame, width=width, height=height)
+        return _PooledComponent(component, [option(self.gui.options_frame) for option in component_type.options])
+
+    @property
+    def _current(self) -> Optional[_PooledComponent]:
+        return self._pool.get(self._current_choice)  # type: ignore
+
+    def _set_options_tracks(self, pooled: _PooledComponent) -> None:
+        for option in pooled.options:
+            option.set_tracks(self._tracks)  # type: ignore
+        pooled.tracks = self._tracks
+
+    def _shown_state(self) -> Optional[Hashable]:
+        """The tracks and filters an analysis would use now, or None if the filters can't say what they're set to"""
+        filter_states = tuple(filter_.settings() for filter_ in self._filters)
+        if self._tracks is None or any(state is None for state in filter_states):
+            return None
+        return (self._tracks.fingerprint, filter_states)
 
     def _on_analyze(self) -> None:
-        if self._tracks is not None:
-            tracks = self._tracks
-            for filter_ in self._filters:
-                tracks = filter_.filter(tracks)
+        pooled = self._current
+        if self._tracks is None or pooled is None:
+            return
+        try:
+            filters = [(f"filter {type(filter_).__name__}", filter_.prepare()) for filter_ in self._filters]
+            args = [widget.get_value() for widget in pooled.options]
+            shown = self._shown_state()
+            key = self._result_key(pooled, shown)
+        except Exception as err:  # pylint: disable=broad-except
+            logger.exception("Error reading filters and options")
+            showerror(title="Error", message=f"Error analyzing data: {err}")
+            return
+
+        tracks, last_view, component = self._tracks, self._view, pooled.component
+        if key is not None and (cached := self._results.get(key)) is not None:
+            self._on_cancel()
+            self._render(pooled, shown, cached)
+            return
+        stages = len(filters) + 1
+
+        def run(job: Job) -> Tuple[TrackView, Any, int, instrumentation.Stats]:
+            with instrumentation.collect() as recorded:
+                view = TrackView(tracks)
+                for stage, (name, filter_) in enumerate(filters):
+                    job.report(stage / stages, "Filtering")
+                    with instrumentation.stage(name):
+                        view = filter_(view)
+                # Reusing the last view when the filters select the same rows keeps its table, and what's cached on it
+                if view == last_view:
+                    view = last_view
+                job.report((stages - 1) / stages, "Analyzing")
+                with instrumentation.stage(f"compute {component.name}"):
+                    computed = component.compute(view.table, *args)
+            # Measured here rather than when it's cached, since walking a big result would stall the window
+            return view, computed, approximate_size(computed) if key is not None else 0, recorded
+
+        self.gui.analysis_progress.show(0.0, "Filtering")
+        self._worker.submit(
+            run,
+            functools.partial(self._on_analyzed, pooled, shown, key),
+            on_error=self._on_analyze_error,
+            on_progress=self.gui.analysis_progress.show,
+        )
+
+    def _result_key(self, pooled: _PooledComponent, shown: Optional[Hashable]) -> Optional[Hashable]:
+        """Identifies the result of analyzing, or None if it isn't worth caching or can't be identified"""
+        # Components that only implement `analyze` compute the tracks themselves, which aren't worth keeping
+        if shown is None or type(pooled.component).compute is Component.compute:
+            return None
+        key = (shown, pooled.component.name, tuple(widget.settings() for widget in pooled.options))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _on_analyzed(
+        self,
+        pooled: _PooledComponent,
+        shown: Optional[Hashable],
+        key: Optional[Hashable],
+        result: Tuple[TrackView, Any, int, instrumentation.Stats],
+    ) -> None:
+        self.gui.analysis_progress.hide()
+        self._view, computed, size, recorded = result
+        if key is not None:
+            self._results.put(key, computed, size)
+        self._render(pooled, shown, computed, recorded)
+
+    def _render(
+        self,
+        pooled: _PooledComponent,
+        shown: Optional[Hashable],
+        computed: Any,
+        recorded: Optional[instrumentation.Stats] = None,
+    ) -> None:
+        """Shows a computed result, along with the stages `recorded` computing it, which are None if it was cached"""
+        name = pooled.component.name
+        with instrumentation.collect() as rendered:
             try:
-                self._current_component.analyze(tracks, *(widget.get_value() for widget in self._options))  # type: ignore
+                with instrumentation.stage(f"render {name}"):
+                    pooled.component.render(computed)
             except Exception as err:  # pylint: disable=broad-except
-                logger.exception("Error analyzing data")
-                showerror(title="Error", message=f"Error analyzing data: {err}")
+                pooled.shown = None
+                self._on_analyze_error(err)
+                return
+        pooled.shown = shown
+        if recorded is None:
+            self._report_stages(f"Showed the cached analysis of {name}", rendered)
+        else:
+            self._report_stages(f"Analyzed {name}", {**recorded, **rendered})
+
+    def _report_stages(self, message: str, recorded: instrumentation.Stats) -> None:
+        instrumentation.log_stages(message, recorded)
+        self.gui.status_var.set(f"{message}: {instrumentation.summary(recorded)}")
+        if self._stages_window is not None:
+            self._stages_window.refresh()
+
+    def _on_show_stages(self, _event: tk.Event) -> None:
+        if self._stages_window is not None and self._stages_window.winfo_exists():
+            self._stages_window.lift()
+            return
+        self._stages_window = StagesWindow(self.gui)
+        self._stages_window.bind("<Destroy>", self._on_stages_closed)
+
+    def _on_stages_closed(self, event: tk.Event) -> None:
+        if event.widget is self._stages_window:
+            self._stages_window = None
+
+    def _on_analyze_error(self, err: Exception) -> None:
+        self.gui.analysis_progress.hide()
+        logger.error("Error analyzing data", exc_info=err)
+        showerror(title="Error", message=f"Error analyzing data: {err}")
+
+    def _on_cancel(self) -> None:
+        self._worker.cancel()
+        self.gui.analysis_progress.hide()
 
     def on_load(self, path: str) -> None:
-        result = utils.load_tracks(path)
+        config = self._config
+
+        def run(job: Job) -> ingest.LoadTracksResult:
+            result = ingest.load_tracks(
+                path,
+                cache_directory=config.cache_directory,
+                workers=config.load_workers,
+                streaming=config.streaming_ingest,
+                on_file=_ProgressiveLoad(job),
+                store_path=config.store_path,
+            )
+            # Worked out here so looking up cached results on the Tk thread is quick
+            _ = result.tracks.fingerprint
+            return result
+
+        self.gui.load_progress.show(0.0, "Loading")
+        self._load_worker.submit(
+            run,
+            self._on_loaded,
+            on_error=self._on_load_error,
+            on_progress=self.gui.load_progress.show,
+            on_partial=self._on_partial_load,
+        )
+
+    def _on_partial_load(self, tracks: TrackTable) -> None:
+        self._tracks = tracks
+        # Partial results are only worth showing if they don't hold up showing the next ones
+        if not self._worker.busy:
+            self._on_analyze()
+
+    def _on_loaded(self, result: ingest.LoadTracksResult) -> None:
+        self.gui.load_progress.hide()
+        self._report_stages(f"Loaded {len(result.tracks):,d} plays", result.stages)
         if result.errors:
             showwarning(title="Warning", message=f"Error loading tracks files: {result.errors}")
-        self._tracks = result.tracks
-        for option in self._options:
-            option.set_tracks(self._tracks)
+        self._set_tracks(result.tracks)
+
+    def _on_load_error(self, err: Exception) -> None:
+        self.gui.load_progress.hide()
+        logger.error("Error loading tracks", exc_info=err)
+        showerror(title="Error", message=f"Error loading tracks: {err}")
+
+    def _on_cancel_load(self) -> None:
+        self._load_worker.cancel()
+        self.gui.load_progress.hide()
+        # Whatever was loaded before cancelling stays
+        if self._tracks is not None:
+            self._set_tracks(self._tracks)
+
+    def _set_tracks(self, tracks: TrackTable) -> None:
+        self._tracks = tracks
+        if self._current is not None:
+            self._set_options_tracks(self._current)
         self._on_analyze()
+
+
+class _ProgressiveLoad:
+    """Reports the progress of loading files, publishing the tracks loaded so far as partial results"""
+
+    def __init__(self, job: Job):
+        self._job = job
+        self._published = -math.inf
+        self._cost = 0.0
+
+    def __call__(self, done: int, total: int, tables: Sequence[TrackTable]) -> None:
+        self._job.report(done / total, f"Loaded {done} of {total} files")
+        # Merging every table loaded so far gets slower as more are loaded, so partial results are published less often
+        # as they get more expensive, keeping the overhead to a fraction of the load
+        now = time.perf_counter()
+        if done < total and tables and now - self._published >= max(_PARTIAL_INTERVAL, 4 * self._cost):
+            tracks = TrackTable.concatenate(tables)
+            _ = tracks.fingerprint
+            self._job.publish(tracks)
+            self._published = time.perf_counter()
+            self._cost = self._published - now
@@ -1,3 +1,29 @@
+from typing import Any, Type
+
+from analyzers import Analyzer, TextAnalyzer
 from gui.components.component import Component
-from gui.components.plotcomponent import PlotComponent
-from gui.components.textcomponent import TextComponent
+from gui.components.textcomponent import AnalyzerTextComponent, TextComponent
+
+
+def __getattr__(name: str) -> Any:
+    # Importing PlotComponent imports matplotlib, which is left until something that plots is needed
+    if name == "PlotComponent":
+        from gui.components.plotcomponent import PlotComponent  # pylint: disable=import-outside-toplevel
+
+        return PlotComponent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def analyzer_component(analyzer: Type[Analyzer]) -> Type[Component]:
+    """A component that shows what `analyzer` computes, with widgets for its options"""
+    attributes = {"analyzer": analyzer, "name": analyzer.name, "dim": analyzer.dim, "options": analyzer.options}
+    if issubclass(analyzer, TextAnalyzer):
+        return type(analyzer.__name__, (AnalyzerTextComponent,), attributes)
+
+    # pylint: disable=import-outside-toplevel
+    from analyzers.plotanalyzer import PlotAnalyzer
+    from gui.components.plotcomponent import AnalyzerPlotComponent
+
+    if not issubclass(analyzer, PlotAnalyzer):
+        raise ValueError(f"{analyzer.name!r} doesn't compute text or a plot")
+    return type(analyzer.__name__, (AnalyzerPlotComponent,), {**attributes, "adjust": analyzer.adjust})
@@ -1,16 +1,30 @@
 import abc
 from tkinter import ttk
-from typing import Any, List, Sequence
+from typing import Any, Sequence
 
 from gui.options import Option
-from track import Track
+from tracktable import TrackTable
 
 
 class Component(ttk.Frame, metaclass=abc.ABCMeta):
+    """
+    An analysis of the listening history
+
+    Analyzing is split into `compute`, which runs on a background thread and must not touch any widgets, and `render`,
+    which shows its result on the Tk thread. Components that only implement `analyze` do all of their work in `render`.
+    """
+
     name: str
     dim = (600, 400)
     options: Sequence[Option] = tuple()
 
     @abc.abstractmethod
-    def analyze(self, tracks: List[Track], *args: Any) -> None:
+    def analyze(self, tracks: TrackTable, *args: Any) -> None:
         return
+
+    def compute(self, tracks: TrackTable, *args: Any) -> Any:
+        return tracks, args
+
+    def render(self, result: Any) -> None:
+        tracks, args = result
+        self.analyze(tracks, *args)
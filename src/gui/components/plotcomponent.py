@@ -1,27 +1,129 @@
 import abc
+import copy
 import tkinter as tk
-from typing import Iterable, List
+from tkinter import ttk
+from typing import Any, Iterable, List, Optional, Sequence, Type
 
 import matplotobjlib as plot
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
 
+from analyzers.plotanalyzer import PlotAnalyzer, draw_subplot
 from gui.components.component import Component
-from track import Track
+from tracktable import TrackTable
 from type_hints import Parent
 
 
 class PlotComponent(Component):
-    adjust = plot.SubplotsAdjust(left=0.07, right=0.975, top=0.975, bottom=0.08)
+    """
+    A component that draws one subplot
+
+    `compute` can return any result that `plot` turns into a subplot, which by default is the subplot `subplot`
+    returns. Components can implement `update_plot` to change the data of the figure they've already drawn instead of
+    having it rebuilt. The artists it changes are then redrawn over a cached copy of the rest of the figure.
+    """
+
+    adjust = PlotAnalyzer.adjust
 
     def __init__(self, parent: Parent, **kwargs):
         super().__init__(parent, **kwargs)
-        self._figure = None
+        self._figure_frame: Optional[ttk.Frame] = None
+        self._canvas: Optional[FigureCanvasTkAgg] = None
+        self._result: Any = None
+        self._animated: List[Artist] = []
+        self._background: Any = None
+
+    def analyze(self, tracks: TrackTable, *args) -> None:
+        self.render(self.compute(tracks, *args))
+
+    def compute(self, tracks: TrackTable, *args) -> Any:
+        return self.subplot(tracks, *args)
+
+    def render(self, result: Any) -> None:
+        if self._canvas is not None and self._result is not None:
+            axes = self._axes
+            limits = axes.viewLim.bounds
+            changed = self.update_plot(axes, self._result, result)
+            if changed is not None:
+                self._result = result
+                self._blit(changed, redraw=tuple(axes.viewLim.bounds) != tuple(limits))
+                return
 
-    def analyze(self, tracks: List[Track], *args) -> None:
-        if self._figure:
-            self._figure.destroy()
-        self._figure = plot.TkFigure(self, plot.FigureOptions([[self.subplot(tracks, *args)]], adjust=self.adjust))
-        self._figure.pack(expand=True, fill=tk.BOTH)  # type: ignore
+        if self._figure_frame is not None:
+            self._figure_frame.destroy()
+        self._figure_frame = ttk.Frame(self)
+        self._canvas = FigureCanvasTkAgg(Figure(), master=self._figure_frame)
+        self._canvas.get_tk_widget().pack(expand=True, fill=tk.BOTH)
+        NavigationToolbar2Tk(self._canvas, self._figure_frame).update()
+        # The subplot keeps the axes it's drawn on, so it gets a copy to leave `result` as it was computed
+        draw_subplot(self._canvas.figure, copy.copy(self.plot(result)), self.adjust)
+        self._figure_frame.pack(expand=True, fill=tk.BOTH)
+        self._result = result
+        self._animated = []
+        self._background = None
+        self._canvas.mpl_connect("draw_event", self._on_draw)
+        self._canvas.draw_idle()
 
     @abc.abstractmethod
-    def subplot(self, tracks: List[Track]) -> plot.SubPlot:
+    def subplot(self, tracks: TrackTable) -> plot.SubPlot:
         return NotImplemented
+
+    def plot(self, result: Any) -> plot.SubPlot:
+        """The subplot that shows a result of `compute`"""
+        return result
+
+    def update_plot(self, axes: Axes, current: Any, new: Any) -> Optional[Sequence[Artist]]:
+        """
+        Changes the artists that the `current` result drew on `axes` so that they show the `new` result instead
+
+        Returns the artists that changed, or None if the plot has to be rebuilt.
+        """
+        return None
+
+    @property
+    def _axes(self) -> Axes:
+        return self._canvas.figure.axes[0]  # type: ignore
+
+    def _blit(self, artists: Iterable[Artist], *, redraw: bool) -> None:
+        artists = list(artists)
+        if redraw or self._background is None or artists != self._animated:
+            # Artists that change are left out of the cached background and drawn over it by `_on_draw`
+            for artist in self._animated:
+                artist.set_animated(False)
+            for artist in artists:
+                artist.set_animated(True)
+            self._animated = artists
+            self._canvas.draw()  # type: ignore
+            return
+
+        self._canvas.restore_region(self._background)  # type: ignore
+        self._draw_animated()
+        self._canvas.blit(self._canvas.figure.bbox)  # type: ignore
+
+    def _on_draw(self, _event: Any) -> None:
+        self._background = self._canvas.copy_from_bbox(self._canvas.figure.bbox)  # type: ignore
+        self._draw_animated()
+
+    def _draw_animated(self) -> None:
+        for artist in self._animated:
+            self._axes.draw_artist(artist)
+
+
+class AnalyzerPlotComponent(PlotComponent):
+    """Draws what a `PlotAnalyzer` computes"""
+
+    analyzer: Type[PlotAnalyzer]
+
+    def compute(self, tracks: TrackTable, *args) -> Any:
+        return self.analyzer.compute(tracks, *args)
+
+    def subplot(self, tracks: TrackTable, *args) -> plot.SubPlot:  # pylint: disable=arguments-differ
+        return self.plot(self.compute(tracks, *args))
+
+    def plot(self, result: Any) -> plot.SubPlot:
+        return self.analyzer.plot(result)
+
+    def update_plot(self, axes: Axes, current: Any, new: Any) -> Optional[Sequence[Artist]]:
+        return self.analyzer.update_plot(axes, current, new)
@@ -1,9 +1,10 @@
 import abc
 import tkinter as tk
-from typing import List
+from typing import Type
 
+from analyzers import TextAnalyzer
 from gui.components.component import Component
-from track import Track
+from tracktable import TrackTable
 from type_hints import Parent
 
 
@@ -13,12 +14,27 @@ class TextComponent(Component):
         self._text = tk.Text(self, state="disabled")
         self._text.pack(expand=True, fill=tk.BOTH)
 
-    def analyze(self, tracks: List[Track], *args) -> None:
+    def analyze(self, tracks: TrackTable, *args) -> None:
+        self.render(self.compute(tracks, *args))
+
+    def compute(self, tracks: TrackTable, *args) -> str:
+        return self.text(tracks, *args)
+
+    def render(self, result: str) -> None:
         self._text.configure(state="normal")
         self._text.delete("1.0", tk.END)
-        self._text.insert("1.0", self.text(tracks, *args))
+        self._text.insert("1.0", result)
         self._text.configure(state="disabled")
 
     @abc.abstractmethod
-    def text(self, tracks: List[Track], *args) -> str:
+    def text(self, tracks: TrackTable, *args) -> str:
         return NotImplemented
+
+
+class AnalyzerTextComponent(TextComponent):
+    """Shows the text a `TextAnalyzer` computes"""
+
+    analyzer: Type[TextAnalyzer]
+
+    def text(self, tracks: TrackTable, *args) -> str:
+        return self.analyzer.compute(tracks, *args)
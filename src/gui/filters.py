@@ -1,8 +1,9 @@
 import datetime
+import functools
 import tkinter as tk
 from pathlib import Path
 from tkinter import ttk
-from typing import Any, List, Optional, Protocol, Set
+from typing import Any, Callable, Hashable, List, Optional, Protocol, Set, Tuple
 
 import tzlocal
 from backports import zoneinfo
@@ -11,14 +12,27 @@ from PIL import Image, ImageTk
 import utils
 from gui.calendarwidget import get_datetime
 from gui.searchablecombobox import SearchableComboBox
-from track import Track
+from tracktable import TrackView, to_ms
 from type_hints import Parent
 
 
 class FilterWidget(ttk.Frame):
-    def filter(self, tracks: List[Track]) -> List[Track]:
+    def filter(self, tracks: TrackView) -> TrackView:
         return tracks
 
+    def prepare(self) -> Callable[[TrackView], TrackView]:
+        """
+        Reads the settings of this filter from its widgets, returning a function that filters with them
+
+        Analysis calls this on the Tk thread and filters on a background thread, so filters whose `filter` reads their
+        widgets should override this to read them up front.
+        """
+        return self.filter
+
+    def settings(self) -> Optional[Hashable]:
+        """The settings of this filter in a normalized form, or None if they can't be described, which turns off caching"""
+        return None
+
 
 class Filter(Protocol):
     def __call__(self, parent: Parent = None) -> FilterWidget:
@@ -54,12 +68,21 @@ class DateRangeFilter(FilterWidget):
         self._start_entry.state([state])
         self._end_entry.state([state])
 
-    def filter(self, tracks: List[Track]) -> List[Track]:
-        if start := self._start_var.get():
-            tracks = [track for track in tracks if datetime.datetime.fromisoformat(start) <= track.start]
-        if end := self._end_var.get():
-            tracks = [track for track in tracks if datetime.datetime.fromisoformat(end) >= track.end]
-        return tracks
+    def filter(self, tracks: TrackView) -> TrackView:
+        return self.prepare()(tracks)
+
+    def prepare(self) -> Callable[[TrackView], TrackView]:
+        start_ms, end_ms = self.settings()
+        if start_ms is None and end_ms is None:
+            return lambda tracks: tracks
+        return lambda tracks: tracks.between(start_ms, end_ms)
+
+    def settings(self) -> Tuple[Optional[int], Optional[int]]:
+        start, end = self._start_var.get(), self._end_var.get()
+        return (
+            to_ms(datetime.datetime.fromisoformat(start)) if start else None,
+            to_ms(datetime.datetime.fromisoformat(end)) if end else None,
+        )
 
     def _on_click_start(self):
         start = get_datetime(self)
@@ -72,13 +95,20 @@ class DateRangeFilter(FilterWidget):
             self._end_var.set(end.date().isoformat())
 
 
+@functools.lru_cache(maxsize=None)
+def available_timezones() -> List[str]:
+    return sorted(zoneinfo.available_timezones())
+
+
 class Timezone(FilterWidget):
     def __init__(self, parent: Parent = None):
         super().__init__(parent)
 
         self._combo_var = tk.StringVar()
         label = ttk.Label(self, text="Timezone: ")
-        combo = ttk.Combobox(self, values=sorted(zoneinfo.available_timezones()), textvariable=self._combo_var)
+        # Finding every timezone means walking the tz database, so it waits until the list is opened
+        combo = ttk.Combobox(self, textvariable=self._combo_var)
+        combo.config(postcommand=lambda: combo.config(values=available_timezones()))
 
         label.pack(side=tk.LEFT)
         combo.pack(side=tk.LEFT, expand=True, fill=tk.X)
@@ -87,8 +117,14 @@ class Timezone(FilterWidget):
 
         self._combo_var.set(tzlocal.get_localzone())
 
-    def filter(self, tracks: List[Track]) -> List[Track]:
-        if zone := self._combo_var.get():
-            tracks = [track.to_timezone(zoneinfo.ZoneInfo(zone)) for track in tracks]
+    def filter(self, tracks: TrackView) -> TrackView:
+        return self.prepare()(tracks)
 
-        return tracks
+    def prepare(self) -> Callable[[TrackView], TrackView]:
+        if not (zone := self._combo_var.get()):
+            return lambda tracks: tracks
+        timezone = zoneinfo.ZoneInfo(zone)
+        return lambda tracks: tracks.to_timezone(timezone)
+
+    def settings(self) -> str:
+        return self._combo_var.get()
@@ -1,34 +1,39 @@
-import colorsys
+import collections
 import tkinter as tk
 from tkinter import ttk
-from typing import Any, Callable, List, Optional, Protocol, Set
-
-from matplotlib.colors import ListedColormap
-
-import utils
+from typing import TYPE_CHECKING, Any, Callable, Hashable, List, Optional, Sequence, Union
+
+# Option, CheckButton and Spinbox are also imported from here by components
+from analyzers.options import (  # pylint: disable=unused-import
+    DEFAULT_HUE,
+    DEFAULT_TOP_ARTISTS,
+    CheckButton,
+    Option,
+    Spinbox,
+    hue_colormap,
+)
+from cube import DailyListens
 from gui.searchablecombobox import SearchableComboBox
-from track import Track
+from tracktable import TrackTable
 from type_hints import Parent
 
-
-def _hue_colormap(hue: float) -> ListedColormap:
-    return ListedColormap([colorsys.hsv_to_rgb(hue, saturation / 255, 1) for saturation in range(255)])
+if TYPE_CHECKING:
+    from matplotlib.colors import ListedColormap
 
 
 class OptionWidget(ttk.Frame):
     def get_value(self) -> Any:
         pass
 
-    def set_tracks(self, tracks: List[Track]) -> None:
-        pass
-
+    def settings(self) -> Hashable:
+        """The value of this option in a form that can be compared and hashed, by default the value itself"""
+        return self.get_value()
 
-class Option(Protocol):
-    def __call__(self, parent: Parent = None) -> OptionWidget:
-        ...
+    def set_tracks(self, tracks: TrackTable) -> None:
+        pass
 
 
-class _CheckButton(OptionWidget):
+class CheckButtonWidget(OptionWidget):
     def __init__(self, parent: Parent, *, text: str):
         super().__init__(parent)
         self._var = tk.IntVar(self)
@@ -40,39 +45,36 @@ class _CheckButton(OptionWidget):
         return bool(self._var.get())
 
 
-class CheckButton:
-    def __init__(self, text: str):
-        self._text = text
-
-    def __call__(self, parent: Parent) -> OptionWidget:
-        return _CheckButton(parent, text=self._text)
-
-
-class _Spinbox(OptionWidget):
-    def __init__(self, parent: Parent, *, text: str, from_: int, to: int, default: int):
+class SpinboxWidget(OptionWidget):
+    def __init__(
+        self,
+        parent: Parent,
+        *,
+        text: str,
+        from_: int,
+        to: int,
+        default: Union[int, str],
+        values: Optional[Sequence[str]] = None,
+    ):
         super().__init__(parent)
         self._var = tk.StringVar(self)
+        self._values = values
         label = ttk.Label(self, text=text)
-        spinbox = ttk.Spinbox(self, from_=from_, to=to, width=5, textvariable=self._var, justify=tk.CENTER)
+        if values is None:
+            spinbox = ttk.Spinbox(self, from_=from_, to=to, width=5, textvariable=self._var, justify=tk.CENTER)
+        else:
+            width = max(len(value) for value in values) + 1
+            spinbox = ttk.Spinbox(self, values=tuple(values), width=width, textvariable=self._var, justify=tk.CENTER)
 
         label.pack(side=tk.LEFT)
         spinbox.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
 
         spinbox.set(default)
+        if values is not None:
+            spinbox.state(["readonly"])
 
-    def get_value(self) -> int:
-        return int(self._var.get())
-
-
-class Spinbox:
-    def __init__(self, *, text: str, from_: int, to: int, default: int):
-        self._text = text
-        self._from = from_
-        self._to = to
-        self._default = default
-
-    def __call__(self, parent: Parent = None) -> OptionWidget:
-        return _Spinbox(parent, text=self._text, from_=self._from, to=self._to, default=self._default)
+    def get_value(self) -> Union[int, str]:
+        return int(self._var.get()) if self._values is None else self._var.get()
 
 
 class ArtistChooser(OptionWidget):
@@ -115,42 +117,41 @@ class ArtistChooser(OptionWidget):
         self._listbox.config(xscrollcommand=hsbar.set)
         self._listbox.config(yscrollcommand=vsbar.set)
         self._listbox.bind("<Delete>", self._on_delete)
-        self._top_artists_spinbox.set(10)
+        self._top_artists_spinbox.set(DEFAULT_TOP_ARTISTS)
 
-        self._artists: Set[str] = set()
         self._top_artists: List[str] = []
+        # How many times each artist is in the listbox, so the combobox can be updated without asking Tk
+        self._chosen: "collections.Counter[str]" = collections.Counter()
 
     def get_value(self) -> List[str]:
         return self._listbox.get(0, tk.END)
 
-    def set_tracks(self, tracks: List[Track]) -> None:
-        self._artists = {track.artist for track in tracks}
-        self._top_artists = [
-            item[0]
-            for item in sorted(
-                {artist: max(listens) for artist, listens in utils.listens_per_day(tracks)[1].items()}.items(),
-                key=lambda item: item[1],
-                reverse=True,
-            )
-        ]
+    def set_tracks(self, tracks: TrackTable) -> None:
+        self._top_artists = list(DailyListens.of(tracks).most_in_a_day())
         self._listbox.delete(0, tk.END)
-        self._configure_combo_box()
+        self._chosen.clear()
+        self._combo_box.config(values=tracks.artist_names())
 
     def _on_add_top_artists(self) -> None:
-        self._listbox.insert(self._listbox.size(), *self._top_artists[: int(self._top_artists_spinbox.get())])
+        self._add(self._top_artists[: int(self._top_artists_spinbox.get())])
 
     def _on_add_artist(self) -> None:
-        self._listbox.insert(self._listbox.size(), self._combo_var.get())
+        self._add([self._combo_var.get()])
         self._combo_var.set("")
-        self._configure_combo_box()
 
     def _on_delete(self, _event: tk.Event) -> None:
         for index in reversed(self._listbox.curselection()):
+            artist = self._listbox.get(index)
             self._listbox.delete(index)
-        self._configure_combo_box()
+            self._chosen[artist] -= 1
+            if not self._chosen[artist]:
+                del self._chosen[artist]
+                self._combo_box.include(artist)
 
-    def _configure_combo_box(self) -> None:
-        self._combo_box.config(values={artist for artist in self._artists if artist not in self.get_value()})
+    def _add(self, artists: List[str]) -> None:
+        self._listbox.insert(self._listbox.size(), *artists)
+        self._combo_box.exclude(*(artist for artist in artists if artist not in self._chosen))
+        self._chosen.update(artists)
 
 
 class HueChooser(ttk.Frame):
@@ -191,7 +192,7 @@ class HueChooser(ttk.Frame):
 
     def _set_hue(self, hue: float) -> None:
         self._hue = hue
-        self._color_map = _hue_colormap(hue)
+        self._color_map = hue_colormap(hue)
         for ind, frame in enumerate(self._frames):
             color = [round(i * 255) for i in self._color_map.colors[ind * self._color_map.N // len(self._frames)]]
             frame.config(background=f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}")
@@ -229,17 +230,20 @@ class ColorMap(OptionWidget):
 
         self._color_frame.bind("<Button-1>", self._on_click)
 
-        self._hue = 240 / 360
-        self._color_map = _hue_colormap(self._hue)
+        self._hue = DEFAULT_HUE
+        self._color_map = hue_colormap(self._hue)
         self._set_color()
 
-    def get_value(self) -> ListedColormap:
+    def get_value(self) -> "ListedColormap":
         return self._color_map
 
+    def settings(self) -> float:
+        return self._hue
+
     def _on_click(self, event: tk.Event) -> None:
         if (hue := ask_hue(hue=self._hue)) is not None:
             self._hue = hue
-            self._color_map = _hue_colormap(self._hue)
+            self._color_map = hue_colormap(self._hue)
             self._set_color()
 
     def _set_color(self) -> None:
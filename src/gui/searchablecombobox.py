@@ -1,10 +1,119 @@
+import bisect
 import contextlib
 import tkinter as tk
 from tkinter import ttk
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from type_hints import Parent
 
+# How many values the popup lists at once, from the one that matches, so it opens as quickly however many there are
+_SHOWN = 100
+
+
+class PrefixIndex:
+    """
+    Values sorted case-insensitively so the first one matching what's been typed is found by bisecting
+
+    Values can be excluded and included again without rebuilding the index. Positions are counted among the values that
+    aren't excluded, matching the order they're listed in.
+    """
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._values = sorted(set(values), key=lambda value: (value.lower(), value))
+        self._keys = [value.lower() for value in self._values]
+        self._positions = {value: position for position, value in enumerate(self._values)}
+        # Substrings are found by searching every key at once, and their offsets say which key they're in
+        self._joined = "\n".join(self._keys)
+        self._offsets = [0] * len(self._keys)
+        for position in range(1, len(self._keys)):
+            self._offsets[position] = self._offsets[position - 1] + len(self._keys[position - 1]) + 1
+        self._excluded: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._values) - len(self._excluded)
+
+    def __iter__(self) -> Iterator[str]:
+        excluded = set(self._excluded)
+        return (value for position, value in enumerate(self._values) if position not in excluded)
+
+    def exclude(self, value: str) -> None:
+        position = self._positions.get(value)
+        if position is not None:
+            index = bisect.bisect_left(self._excluded, position)
+            if index == len(self._excluded) or self._excluded[index] != position:
+                self._excluded.insert(index, position)
+
+    def include(self, value: str) -> None:
+        position = self._positions.get(value)
+        if position is not None:
+            index = bisect.bisect_left(self._excluded, position)
+            if index < len(self._excluded) and self._excluded[index] == position:
+                del self._excluded[index]
+
+    def position(self, value: str) -> Optional[int]:
+        """Where `value` is listed, or None if it's not in the index or excluded"""
+        position = self._positions.get(value)
+        if position is None or self._is_excluded(position):
+            return None
+        return position - bisect.bisect_left(self._excluded, position)
+
+    def match(self, text: str) -> Optional[Tuple[int, str]]:
+        """
+        The position and value of the first value starting with `text`, ignoring case, or if none do, the first one
+        containing it
+        """
+        key = text.lower()
+        # Keys are sorted, so if the first one after excluded values doesn't start with `key`, none of them do
+        position = self._next_included(bisect.bisect_left(self._keys, key))
+        if position < len(self._keys) and self._keys[position].startswith(key):
+            return self._listed(position)
+
+        if "\n" in key:
+            return None
+        offset = self._joined.find(key)
+        while offset != -1:
+            position = bisect.bisect_right(self._offsets, offset) - 1
+            if not self._is_excluded(position):
+                return self._listed(position)
+            offset = self._joined.find(key, self._offsets[position] + len(self._keys[position]) + 1)
+        return None
+
+    def listed_from(self, value: str, count: int) -> List[str]:
+        """`value` and the values listed after it, up to `count` of them"""
+        listed: List[str] = []
+        position = self._positions[value]
+        while len(listed) < count:
+            position = self._next_included(position)
+            if position == len(self._values):
+                break
+            listed.append(self._values[position])
+            position += 1
+        return listed
+
+    def _next_included(self, position: int) -> int:
+        """The first position from `position` on that isn't excluded, or the number of values if there aren't any"""
+        index = bisect.bisect_left(self._excluded, position)
+        if index == len(self._excluded) or self._excluded[index] != position:
+            return position
+        # Excluded positions increase, so a run of consecutive ones all have the same excluded[index] - index, and the
+        # end of the run is found by bisecting for where that changes
+        run = position - index
+        low, high = index + 1, len(self._excluded)
+        while low < high:
+            middle = (low + high) // 2
+            if self._excluded[middle] - middle == run:
+                low = middle + 1
+            else:
+                high = middle
+        return position + low - index
+
+    def _is_excluded(self, position: int) -> bool:
+        index = bisect.bisect_left(self._excluded, position)
+        return index < len(self._excluded) and self._excluded[index] == position
+
+    def _listed(self, position: int) -> Tuple[int, str]:
+        return position - bisect.bisect_left(self._excluded, position), self._values[position]
+
 
 class SearchableComboBox(ttk.Frame):
     def __init__(
@@ -31,8 +140,9 @@ class SearchableComboBox(ttk.Frame):
         self._toplevel: Optional[tk.Toplevel] = None
         self._listbox: Optional[tk.Listbox] = None
         self._scrollbar: Optional[ttk.Scrollbar] = None
+        self._shown: List[str] = []
 
-        self._values: List[str] = []
+        self._values = PrefixIndex()
         self._suggested: Optional[str] = None
         self.config(values=values)
 
@@ -42,9 +152,10 @@ class SearchableComboBox(ttk.Frame):
         if "values" in kwargs:
             values = kwargs.pop("values")
 
-            self._values = sorted(values) if values is not None else []
-            self._suggested = self._values[0] if values is not None else None
-            self._listbox_configure()
+            self._values = PrefixIndex(values if values is not None else ())
+            self._suggested = next(iter(self._values), None)
+            if self._toplevel:
+                self._unpopup()
 
             if values:
                 with self._validation_disabled():
@@ -64,13 +175,29 @@ class SearchableComboBox(ttk.Frame):
             self._popup()
         self._listbox_configure()
 
-        if op == "1" and self._suggested:
+        if op == "1" and self._suggested and self._suggested.lower().startswith(after.lower()):
             self._entry.insert(tk.INSERT, self._suggested[len(after) :])
             self._entry.icursor(len(after))
             self._entry.select_range(tk.INSERT, tk.END)
 
         return False
 
+    def exclude(self, *values: str) -> None:
+        """Stops suggesting `values` without rebuilding the list of values"""
+        for value in values:
+            self._values.exclude(value)
+        if self._toplevel:
+            self._shown = []
+            self._listbox_configure()
+
+    def include(self, *values: str) -> None:
+        """Suggests excluded `values` again"""
+        for value in values:
+            self._values.include(value)
+        if self._toplevel:
+            self._shown = []
+            self._listbox_configure()
+
     def _on_root_click(self, event: tk.Event) -> None:
         if self.winfo_containing(event.x_root, event.y_root) == self._entry:
             if not self._toplevel:
@@ -84,7 +211,7 @@ class SearchableComboBox(ttk.Frame):
 
     def _on_listbox_click(self, _event: tk.Event) -> None:
         selected = self._listbox.curselection()  # type: ignore
-        self._suggested = selected and self._values[selected[0]]
+        self._suggested = selected and self._listbox.get(selected[0])  # type: ignore
         self._select_suggested()
 
     def _on_configure(self, _event: tk.Event) -> None:
@@ -118,17 +245,18 @@ class SearchableComboBox(ttk.Frame):
     def _listbox_configure(self) -> None:
         if self._toplevel:
             self._listbox.select_clear(0, tk.END)  # type: ignore
-            try:
-                ind, self._suggested = next(
-                    (ind, val)
-                    for ind, val in enumerate(self._values)
-                    if val.lower().startswith(self._entry.get().lower())
-                )
-            except StopIteration:
+            match = self._values.match(self._entry.get())
+            if match is None:
                 self._suggested = None
-            else:
-                self._listbox.see(ind)  # type: ignore
-                self._listbox.select_set((ind,))  # type: ignore
+                return
+            _, self._suggested = match
+            # Only the values from the match on are listed, so they're replaced when the match moves
+            if not self._shown or self._shown[0] != self._suggested:
+                self._shown = self._values.listed_from(self._suggested, _SHOWN)
+                self._listbox.delete(0, tk.END)  # type: ignore
+                self._listbox.insert(0, *self._shown)  # type: ignore
+            self._listbox.see(0)  # type: ignore
+            self._listbox.select_set((0,))  # type: ignore
 
     def _popup(self) -> None:
         assert not self._toplevel
@@ -142,7 +270,7 @@ class SearchableComboBox(ttk.Frame):
         )
         self._listbox.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
         self._listbox.bind("<Button-1>", lambda event: self.after(20, self._on_listbox_click, event))  # type: ignore
-        self._listbox.insert(0, *self._values)  # ignore
+        self._shown = []
 
         if len(self._values) > 10:
             self._scrollbar = ttk.Scrollbar(self._toplevel, orient=tk.VERTICAL, command=self._listbox.yview)
@@ -154,6 +282,7 @@ class SearchableComboBox(ttk.Frame):
         self._toplevel.destroy()
         self._toplevel = None
         self._listbox = None
+        self._shown = []
 
     @contextlib.contextmanager
     def _validation_disabled(self):
@@ -0,0 +1,143 @@
+import logging
+import threading
+import tkinter as tk
+from typing import Any, Callable, Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+T = TypeVar("T")
+
+_POLL_MS = 50
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job(Generic[T]):
+    """A function running on a background thread, which can report its progress and be cancelled"""
+
+    def __init__(self, run: Callable[["Job[T]"], T]):
+        self.progress: Tuple[float, str] = (0.0, "")
+        self._partial: Optional[Any] = None
+        self._partial_lock = threading.Lock()
+        self._run = run
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._result: Optional[T] = None
+        self._error: Optional[Exception] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """Stops the job by raising `Cancelled` if it has been cancelled"""
+        if self.cancelled:
+            raise Cancelled()
+
+    def report(self, fraction: float, message: str = "") -> None:
+        self.check()
+        self.progress = (fraction, message)
+
+    def publish(self, partial: Any) -> None:
+        """Makes a partial result available before the job is done, replacing any earlier one that wasn't used yet"""
+        self.check()
+        with self._partial_lock:
+            self._partial = partial
+
+    def take_partial(self) -> Optional[Any]:
+        """The latest partial result that hasn't been taken yet, if any"""
+        with self._partial_lock:
+            partial, self._partial = self._partial, None
+        return partial
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def start(self) -> None:
+        threading.Thread(target=self._target, daemon=True).start()
+
+    def result(self) -> T:
+        """The value the job returned, or raises the exception it raised. Only valid once the job is `done`"""
+        if self._error is not None:
+            raise self._error
+        return self._result  # type: ignore
+
+    def _target(self) -> None:
+        try:
+            self._result = self._run(self)
+        except Exception as err:  # pylint: disable=broad-except
+            self._error = err
+        finally:
+            self._finished.set()
+
+
+class Worker:
+    """
+    Runs jobs off the Tk thread one at a time, handing their results back to the Tk thread
+
+    Submitting a job supersedes the one in flight: it's cancelled, and whatever it returns is ignored. The Tk thread
+    polls the current job with `after`, so callbacks only ever run on the Tk thread.
+    """
+
+    def __init__(self, widget: tk.Misc):
+        self._widget = widget
+        self._job: Optional[Job] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._job is not None
+
+    def submit(
+        self,
+        run: Callable[[Job[T]], T],
+        on_done: Callable[[T], None],
+        *,
+        on_error: Callable[[Exception], None],
+        on_progress: Optional[Callable[[float, str], None]] = None,
+        on_partial: Optional[Callable[[Any], None]] = None,
+    ) -> Job[T]:
+        self.cancel()
+        job = Job(run)
+        self._job = job
+        job.start()
+        self._widget.after(_POLL_MS, self._poll, job, on_done, on_error, on_progress, on_partial)
+        return job
+
+    def cancel(self) -> None:
+        if self._job is not None:
+            logger.info("Cancelling background job")
+            self._job.cancel()
+            self._job = None
+
+    def _poll(
+        self,
+        job: Job[T],
+        on_done: Callable[[T], None],
+        on_error: Callable[[Exception], None],
+        on_progress: Optional[Callable[[float, str], None]],
+        on_partial: Optional[Callable[[Any], None]],
+    ) -> None:
+        if job is not self._job:
+            return
+        if not job.done:
+            if on_progress is not None:
+                on_progress(*job.progress)
+            partial = job.take_partial()
+            if on_partial is not None and partial is not None:
+                on_partial(partial)
+            self._widget.after(_POLL_MS, self._poll, job, on_done, on_error, on_progress, on_partial)
+            return
+
+        self._job = None
+        try:
+            result = job.result()
+        except Exception as err:  # pylint: disable=broad-except
+            on_error(err)
+        else:
+            on_done(result)
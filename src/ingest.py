@@ -0,0 +1,253 @@
+import concurrent.futures
+import contextlib
+import dataclasses
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import instrumentation
+from parsecache import Fingerprint, ParseCache
+from store import HistoryStore
+from tracktable import TrackTable, TrackTableBuilder
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = {" ", "\t", "\n", "\r", ",", "]"}
+
+
+def iter_json_array(file: TextIO, *, chunk_size: int = _CHUNK_SIZE) -> Iterator[Any]:
+    """Yields the values of the top level JSON array in `file` one at a time, reading it `chunk_size` at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    index = 0
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, index, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer, index = buffer[index:] + chunk, 0
+        return not eof
+
+    def next_token() -> str:
+        nonlocal index
+        while True:
+            index = _WHITESPACE.match(buffer, index).end()  # type: ignore
+            if index < len(buffer):
+                return buffer[index]
+            if not read_more():
+                raise ValueError("Unexpected end of JSON array")
+
+    if next_token() != "[":
+        raise ValueError("Expected a JSON array")
+    index += 1
+    if next_token() == "]":
+        return
+
+    while True:
+        next_token()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+            else:
+                # A value that isn't followed by a delimiter, like "12" from "12.5", might continue in the next chunk
+                if eof or buffer[end : end + 1] in _DELIMITERS:
+                    break
+                read_more()
+        index = end
+        yield value
+
+        token = next_token()
+        index += 1
+        if token == "]":
+            return
+        if token != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array but found {token!r}")
+
+
+def find_tracks_files(path: str) -> List[str]:
+    return [
+        os.path.join(root, file_name)
+        for root, _, files in os.walk(path)
+        for file_name in files
+        if re.match("StreamingHistory[0-9]*.json", file_name)
+    ]
+
+
+def parse_tracks_file(path: str) -> TrackTable:
+    with instrumentation.stage("read file"):
+        with open(path, "rb") as file:
+            data = file.read()
+    with instrumentation.stage("decode JSON"):
+        objects = json.loads(data)
+    with instrumentation.stage("build tracks"):
+        return TrackTable.from_json(objects)
+
+
+def stream_tracks_file(path: str) -> TrackTable:
+    builder = TrackTableBuilder()
+    # Reading, decoding and adding each play to the table are interleaved, so they're timed together
+    with instrumentation.stage("stream JSON"):
+        with open(path, encoding="utf-8-sig") as file:
+            for obj in iter_json_array(file):
+                builder.add(obj)
+    with instrumentation.stage("build tracks"):
+        return builder.build()
+
+
+def load_tracks_file(path: str, cache_directory: Optional[str] = None, *, streaming: bool = False) -> TrackTable:
+    parse = stream_tracks_file if streaming else parse_tracks_file
+    # Includes the stages of parsing, unless the file's parsed table was cached
+    with instrumentation.stage("load file"):
+        if cache_directory is not None:
+            return ParseCache(cache_directory).load(path, parse)
+        return parse(path)
+
+
+def peak_rss() -> Optional[int]:
+    """The peak resident set size of this process in bytes, or None if it isn't available on this platform"""
+    if sys.platform == "win32":
+        import ctypes  # pylint: disable=import-outside-toplevel
+        from ctypes import wintypes  # pylint: disable=import-outside-toplevel
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t)
+                for name in (
+                    "PeakWorkingSetSize",
+                    "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage",
+                    "PagefileUsage",
+                    "PeakPagefileUsage",
+                )
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()  # type: ignore
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):  # type: ignore
+            return None
+        return counters.PeakWorkingSetSize
+
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@dataclasses.dataclass
+class LoadTracksResult:
+    tracks: TrackTable
+    errors: List[str]
+    stages: instrumentation.Stats = dataclasses.field(default_factory=dict)
+
+
+def _load_recorded(load: Callable[[str], TrackTable], path: str) -> Tuple[TrackTable, instrumentation.Stats]:
+    """Loads a file in a worker process, along with the stages it took, which are recorded in that process"""
+    with instrumentation.collect() as stats:
+        return load(path), stats
+
+
+def _recorded_result(future: "concurrent.futures.Future[Tuple[TrackTable, instrumentation.Stats]]") -> TrackTable:
+    table, stats = future.result()
+    instrumentation.RECORDER.add(stats)
+    return table
+
+
+def load_tracks(
+    path: str,
+    *,
+    cache_directory: Optional[str] = None,
+    workers: int = 1,
+    streaming: bool = False,
+    on_file: Optional[Callable[[int, int, Sequence[TrackTable]], None]] = None,
+    store_path: Optional[str] = None,
+) -> LoadTracksResult:
+    """
+    Loads every streaming history file under `path`
+
+    `on_file` is called with the number of files done, the number of files and the tables loaded so far as each file
+    finishes, in whatever order they finish. Exceptions it raises stop the load.
+
+    With a `store_path`, the files are imported into that `HistoryStore`, skipping files it already has, and their
+    plays are read back from it. The tables of the files imported would leave out the plays of the files skipped, so
+    `on_file` isn't given any.
+    """
+    start = time.perf_counter()
+    errors: List[str] = []
+    tables: List[TrackTable] = []
+    found = paths = find_tracks_files(path)
+    load = functools.partial(load_tracks_file, cache_directory=cache_directory, streaming=streaming)
+    with contextlib.ExitStack() as stack:
+        stages = stack.enter_context(instrumentation.collect())
+        store = stack.enter_context(HistoryStore(store_path)) if store_path is not None else None
+        if store is not None:
+            paths = [file_path for file_path in paths if not store.is_current(file_path)]
+            # Like ParseCache, files are fingerprinted before they're parsed, so one that changes meanwhile is imported
+            # again next time
+            fingerprints = {file_path: Fingerprint.of(file_path) for file_path in paths}
+        results: Iterable[Tuple[str, Callable[[], TrackTable]]]
+        pool_size = min(workers, len(paths)) if workers > 1 and len(paths) > 1 else 0
+        if pool_size:
+            executor = concurrent.futures.ProcessPoolExecutor(pool_size)
+            stack.callback(executor.shutdown, wait=False)
+            futures = {
+                executor.submit(_load_recorded, load, file_path): file_path for file_path in paths  # type: ignore
+            }
+            # Files that haven't started loading are dropped if loading stops early
+            for future in futures:
+                stack.callback(future.cancel)
+            results = (
+                (futures[future], functools.partial(_recorded_result, future))
+                for future in concurrent.futures.as_completed(futures)
+            )
+        else:
+            results = ((file_path, functools.partial(load, file_path)) for file_path in paths)
+
+        for done, (file_path, result) in enumerate(results, 1):
+            try:
+                table = result()
+                if store is None:
+                    tables.append(table)
+                else:
+                    store.add(table, fingerprints[file_path])
+            except:  # pylint: disable=bare-except
+                file_name = os.path.basename(file_path)
+                logger.exception("Error loading tracks file %r", file_name)
+                errors.append(file_name)
+            if on_file is not None:
+                on_file(done, len(paths), tables)
+        if store is not None:
+            with instrumentation.stage("read history store"):
+                tracks = store.tracks(files=found)
+        else:
+            with instrumentation.stage("dedup and sort"):
+                tracks = TrackTable.concatenate(tables)
+
+    rss = peak_rss()
+    logger.info(
+        "Loaded %d tracks from %d files with %s ingest in %.2fs, peak RSS %s%s",
+        len(tracks),
+        len(paths),
+        "streaming" if streaming else "buffered",
+        time.perf_counter() - start,
+        "unknown" if rss is None else f"{rss / 2 ** 20:.1f} MiB",
+        # The files were parsed in the pool, so this process's peak doesn't show what parsing them took
+        f" in the main process, not counting {pool_size} parsing processes" if pool_size else "",
+    )
+    return LoadTracksResult(tracks, errors, stages)
@@ -0,0 +1,172 @@
+import contextlib
+import dataclasses
+import logging
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+import utils
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+Stats = Dict[str, "StageStats"]
+
+
+@dataclasses.dataclass
+class StageStats:
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_bytes: Optional[int] = None  # The most memory allocated at once while it ran, if tracemalloc was tracing
+
+    def add(self, other: "StageStats") -> None:
+        self.calls += other.calls
+        self.wall += other.wall
+        self.cpu += other.cpu
+        if other.peak_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes or 0, other.peak_bytes)
+
+
+@dataclasses.dataclass(eq=False)
+class _Frame:
+    peak: int  # The highest traced memory seen while the stage ran
+    start: int  # The traced memory when it started
+
+
+class Recorder:
+    """
+    Calls, wall time, CPU time and memory of named stages, added up over every time each of them ran
+
+    Stages can nest and run on any thread. CPU time is the time of the thread a stage ran on, so it doesn't count other
+    threads working at the same time. Memory is only measured with `measure_memory` while `tracemalloc` is tracing,
+    which needs Python 3.9 or later to find the peak of each stage. Finding it resets the peak `tracemalloc` reports,
+    so it's left off unless nothing else is using `tracemalloc`. Besides the totals, `collect` gathers the stages run by
+    one thread inside a block, like a single load or analysis.
+    """
+
+    def __init__(self, *, measure_memory: bool = False):
+        self.measure_memory = measure_memory
+        self._totals: Stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        frame = self._enter()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            stats = StageStats(1, time.perf_counter() - wall, time.thread_time() - cpu, self._exit(frame))
+            self.add({name: stats})
+
+    @contextlib.contextmanager
+    def collect(self) -> Iterator[Stats]:
+        """Gathers the stages this thread runs inside the block into the dictionary it yields, as well as the totals"""
+        collected: Stats = {}
+        self._collections.append(collected)
+        try:
+            yield collected
+        finally:
+            # Removed by identity, since another block's dictionary can be equal to this one
+            collections = self._collections
+            del collections[next(i for i, other in enumerate(collections) if other is collected)]
+
+    def add(self, stats: Mapping[str, StageStats]) -> None:
+        """Adds stages that ran elsewhere, like in another process, to the totals and what this thread collects"""
+        with self._lock:
+            _add(self._totals, stats)
+        for collected in self._collections:
+            _add(collected, stats)
+
+    def totals(self) -> Stats:
+        with self._lock:
+            return {name: dataclasses.replace(stats) for name, stats in self._totals.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    @property
+    def _collections(self) -> List[Stats]:
+        if not hasattr(self._local, "collections"):
+            self._local.collections = []
+        return self._local.collections
+
+    @property
+    def _frames(self) -> List[_Frame]:
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    def _enter(self) -> Optional[_Frame]:
+        if not self.measure_memory or not tracemalloc.is_tracing() or not hasattr(tracemalloc, "reset_peak"):
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak is reset for the new stage, so the stages it's inside keep the peak they reached before it
+        for outer in self._frames:
+            outer.peak = max(outer.peak, peak)
+        tracemalloc.reset_peak()  # type: ignore # pylint: disable=no-member
+        frame = _Frame(peak=current, start=current)
+        self._frames.append(frame)
+        return frame
+
+    def _exit(self, frame: Optional[_Frame]) -> Optional[int]:
+        if frame is None:
+            return None
+        self._frames.pop()
+        if not tracemalloc.is_tracing():
+            return None
+        peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+        for outer in self._frames:
+            outer.peak = max(outer.peak, peak)
+        return peak - frame.start
+
+
+def _add(stats: Stats, other: Mapping[str, StageStats]) -> None:
+    for name, stage_stats in other.items():
+        stats.setdefault(name, StageStats()).add(stage_stats)
+
+
+RECORDER = Recorder()
+stage = RECORDER.stage
+collect = RECORDER.collect
+
+
+def trace_memory(enabled: bool) -> None:
+    """
+    Starts or stops measuring the memory of each stage, which slows down everything that allocates
+
+    Stages are only measured if this started `tracemalloc`, and it's only stopped here if it was started here.
+    """
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        RECORDER.measure_memory = True
+    elif not enabled and RECORDER.measure_memory:
+        tracemalloc.stop()
+        RECORDER.measure_memory = False
+
+
+def summary(stats: Mapping[str, StageStats]) -> str:
+    """The stages in `stats` on one line, in the order they first ran"""
+    return ", ".join(
+        f"{name} {stage_stats.wall:.2f}s" + (f" ({stage_stats.calls}x)" if stage_stats.calls > 1 else "")
+        for name, stage_stats in stats.items()
+    )
+
+
+def format_table(stats: Mapping[str, StageStats]) -> str:
+    rows: List[Any] = [("Stage", "Calls", "Wall", "CPU", "Peak memory")]
+    for name, stage_stats in sorted(stats.items(), key=lambda item: -item[1].wall):
+        peak = "-" if stage_stats.peak_bytes is None else f"{stage_stats.peak_bytes / 2 ** 20:.1f} MiB"
+        rows.append((name, stage_stats.calls, f"{stage_stats.wall:.3f}s", f"{stage_stats.cpu:.3f}s", peak))
+    return utils.pformat_table(rows, justify="<", sep="  ")
+
+
+def as_dict(stats: Mapping[str, StageStats]) -> Dict[str, Dict[str, Any]]:
+    return {name: dataclasses.asdict(stage_stats) for name, stage_stats in stats.items()}
+
+
+def log_stages(message: str, stats: Mapping[str, StageStats]) -> None:
+    logger.info("%s: %s", message, summary(stats))
@@ -1,13 +1,33 @@
+import time
+
+STARTED = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+import logging
+import multiprocessing
 import tkinter as tk
 from pathlib import Path
+from typing import Dict
 
+import instrumentation
 import utils
 from config import Config
 from gui.analysis import Analysis
 from gui.menu import Menu
 from gui.styles import configure_styles
 
+logger = logging.getLogger("analyzer.startup")
+
+
+def report_startup(timings: Dict[str, float]) -> None:
+    stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items())
+    logger.info("Started in %.3fs (%s)", sum(timings.values()), stages)
+
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    timings = {"imports": time.perf_counter() - STARTED}
+
     root = tk.Tk()
     root.title("Spotify Analyzer")
     root.iconbitmap(Path("resources") / "icon.ico")
@@ -16,11 +36,20 @@ if __name__ == "__main__":
     config = Config.load("config.toml")
     if config.enable_logs:
         utils.configure_logger("analyzer", "logs.txt")
+    instrumentation.trace_memory(config.trace_memory)
+    timings["config"] = time.perf_counter() - STARTED - sum(timings.values())
 
     analysis = Analysis(root, config=config)
     analysis.gui.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
 
     menu = Menu(root, on_load=analysis.on_load)
     root.config(menu=menu)
+    timings["window"] = time.perf_counter() - STARTED - sum(timings.values())
+
+    def on_idle() -> None:
+        # Runs after the first analyzer is created, since that's also left until the window is idle
+        timings["first analyzer"] = time.perf_counter() - STARTED - sum(timings.values())
+        report_startup(timings)
 
+    root.after_idle(on_idle)
     root.mainloop()
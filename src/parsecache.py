@@ -0,0 +1,110 @@
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from tracktable import TrackTable
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+_FORMAT = 1
+_CHUNK_SIZE = 1 << 20
+
+
+@dataclasses.dataclass(frozen=True)
+class Fingerprint:
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+    @staticmethod
+    def of(path: str, *, digest: Optional[str] = None) -> "Fingerprint":
+        stat = os.stat(path)
+        return Fingerprint(
+            path=os.path.abspath(path), size=stat.st_size, mtime_ns=stat.st_mtime_ns, digest=digest or _digest(path)
+        )
+
+    def same_stat(self, path: str) -> bool:
+        stat = os.stat(path)
+        return self.path == os.path.abspath(path) and self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        while chunk := file.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed streaming history files
+
+    Each file gets one `.npz` entry holding its `TrackTable` along with the fingerprint of the file it was parsed
+    from. An entry is used as is when the size and modification time still match, is re-validated by content hash
+    when they don't, and is replaced when the content has changed.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, path: str, parse: Callable[[str], TrackTable]) -> TrackTable:
+        entry_path = self._entry_path(path)
+        cached = self._read(entry_path)
+        if cached is not None:
+            fingerprint, table = cached
+            if fingerprint.same_stat(path):
+                logger.info("Loaded %r from cache", path)
+                return table
+            digest = _digest(path)
+            if digest == fingerprint.digest:
+                logger.info("Loaded %r from cache after verifying its contents", path)
+                self._write(entry_path, Fingerprint.of(path, digest=digest), table)
+                return table
+
+        logger.info("Parsing %r", path)
+        fingerprint = Fingerprint.of(path)
+        table = parse(path)
+        self._write(entry_path, fingerprint, table)
+        return table
+
+    def _entry_path(self, path: str) -> str:
+        return os.path.join(self._directory, hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + ".npz")
+
+    @staticmethod
+    def _read(entry_path: str) -> Optional[Tuple[Fingerprint, TrackTable]]:
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            with np.load(entry_path) as entry:
+                if entry["format"] != _FORMAT:
+                    return None
+                fingerprint = Fingerprint(
+                    path=str(entry["path"]),
+                    size=int(entry["size"]),
+                    mtime_ns=int(entry["mtime_ns"]),
+                    digest=str(entry["digest"]),
+                )
+                return fingerprint, TrackTable.from_arrays(entry)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Error reading cache entry %r", entry_path)
+            return None
+
+    @staticmethod
+    def _write(entry_path: str, fingerprint: Fingerprint, table: TrackTable) -> None:
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                np.savez(file, format=_FORMAT, **dataclasses.asdict(fingerprint), **table.to_arrays())
+            os.replace(temp_path, entry_path)
+        except OSError:
+            logger.exception("Error writing cache entry %r", entry_path)
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
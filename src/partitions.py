@@ -0,0 +1,73 @@
+import collections
+import logging
+import os
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from tracktable import TrackTable
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+
+def table_bytes(tracks: TrackTable) -> int:
+    """The bytes used by the columns of `tracks`, leaving out its dictionaries"""
+    return sum(column.nbytes for column in (tracks.start, tracks.end, tracks.duration, tracks.artist, tracks.track))
+
+
+class MonthPartitions:
+    """
+    A listening history too big to hold in memory, written to `directory` a month at a time
+
+    Plays are partitioned by the month they start in as recorded, so duplicates of a play always land in the same
+    partition, and partitions in order of their months hold the plays in the same order as one concatenated table.
+    Added plays are kept in memory until they use more than `memory_budget` bytes and then written out as an .npz file
+    for each month, so each partition is only read back whole when it's iterated over.
+    """
+
+    def __init__(self, directory: str, memory_budget: int):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        os.makedirs(directory, exist_ok=True)
+        self._buffered: Dict[str, List[TrackTable]] = collections.defaultdict(list)
+        self._buffered_bytes = 0
+        self._files: Dict[str, List[str]] = collections.defaultdict(list)
+
+    def add(self, tracks: TrackTable) -> None:
+        if tracks.timezone is not None:
+            raise ValueError("Only tables of recorded times can be partitioned")
+        months = tracks.start.astype("datetime64[ms]").astype("datetime64[M]")
+        order = np.argsort(months, kind="stable")
+        boundaries = np.flatnonzero(np.diff(months[order].astype(np.int64))) + 1
+        for rows in np.split(order, boundaries):
+            if len(rows):
+                # Pieces only keep the names they use, so merging a month's pieces doesn't sort every name in the file
+                self._buffered[str(months[rows[0]])].append(tracks.take(rows).compacted())
+        self._buffered_bytes += table_bytes(tracks)
+        if self._buffered_bytes > self.memory_budget:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the plays kept in memory to disk"""
+        for month, tables in self._buffered.items():
+            path = os.path.join(self.directory, f"{month}-{len(self._files[month])}.npz")
+            np.savez(path, **TrackTable.concatenate(tables).to_arrays())
+            self._files[month].append(path)
+        logger.info("Wrote %d bytes of plays in %d months to disk", self._buffered_bytes, len(self._buffered))
+        self._buffered.clear()
+        self._buffered_bytes = 0
+
+    def months(self) -> List[str]:
+        return sorted(set(self._files) | set(self._buffered))
+
+    def __iter__(self) -> Iterator[TrackTable]:
+        """Each partition with duplicates removed, from the earliest month"""
+        for month in self.months():
+            tables = list(self._buffered.get(month, ()))
+            for path in self._files.get(month, ()):
+                with np.load(path) as arrays:
+                    tables.append(TrackTable.from_arrays(arrays))
+            partition = TrackTable.concatenate(tables)
+            if table_bytes(partition) > self.memory_budget:
+                logger.warning("The plays of %s use more than the memory budget", month)
+            yield partition
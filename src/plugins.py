@@ -0,0 +1,54 @@
+"""Imports the analyzers, components and filters in the component directory, and the built in ones by name"""
+import functools
+import importlib
+import importlib.util
+import logging
+import os
+import time
+import types
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_modules(path: str) -> Tuple[types.ModuleType, ...]:
+    modules: List[types.ModuleType] = []
+    for name in os.listdir(path):
+        full_path = os.path.join(path, name)
+        module_name = f"components.{name}"
+        if os.path.isfile(full_path) and name.endswith(".py"):
+            try:
+                spec = importlib.util.spec_from_file_location(module_name, full_path)
+                if spec is None or spec.loader is None:
+                    raise ImportError(f"Can't import {full_path}")
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            except:  # pylint: disable=bare-except
+                logger.exception("Error loading module %r:", name)
+            else:
+                modules.append(module)
+    return tuple(modules)
+
+
+def load_plugins(path: str, base: type) -> List[Any]:
+    """
+    The subclasses of `base` defined in the modules in `path`
+
+    `base` is usually abstract, which mypy won't accept as a `Type[T]`, so callers annotate what they get back.
+    """
+    return [
+        obj
+        for module in _load_modules(path)
+        for obj in (getattr(module, name) for name in dir(module))
+        if isinstance(obj, type) and issubclass(obj, base) and obj.__module__ == module.__name__
+    ]
+
+
+def import_spec(spec: str) -> Any:
+    """Imports what `spec` names, as `module:attribute`"""
+    start = time.perf_counter()
+    module_name, _, attribute = spec.partition(":")
+    imported = getattr(importlib.import_module(module_name), attribute)
+    logger.info("Imported %s in %.3fs", spec, time.perf_counter() - start)
+    return imported
@@ -0,0 +1,86 @@
+import collections
+import logging
+import sys
+from typing import Any, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+
+def approximate_size(obj: Any) -> int:
+    """The bytes used by `obj` and everything it references, counting shared objects once"""
+    seen: Set[int] = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, np.ndarray):
+            # Arrays that own their data include it in their size. The objects in object arrays are left out, since
+            # walking every name in a table's dictionaries takes as long as a small analysis
+            if item.base is not None:
+                pending.append(item.base)
+        elif isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+        elif hasattr(item, "__dict__"):
+            pending.append(item.__dict__)
+    return size
+
+
+class ResultCache:
+    """
+    Least recently used cache of analysis results, holding at most `max_bytes` of them
+
+    Results are measured with `approximate_size` when they're added, unless they come with their size, and results
+    bigger than the whole cache aren't kept at all.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "collections.OrderedDict[Hashable, Tuple[Any, int]]" = collections.OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            logger.info("Result cache miss (%d hits, %d misses)", self.hits, self.misses)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        logger.info("Result cache hit (%d hits, %d misses)", self.hits, self.misses)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = approximate_size(value)
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            logger.info("Evicted a %d byte result from the result cache", evicted_size)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,277 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from parsecache import Fingerprint
+from tracktable import TrackTable
+
+logger = logging.getLogger(f"analyzer.{__name__}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS tracks (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS plays (
+    end_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    artist_id INTEGER NOT NULL REFERENCES artists (id),
+    track_id INTEGER NOT NULL REFERENCES tracks (id),
+    start_ms INTEGER NOT NULL,
+    PRIMARY KEY (end_ms, duration_ms, artist_id, track_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS plays_by_artist ON plays (artist_id, end_ms);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_plays (
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    end_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    artist_id INTEGER NOT NULL,
+    track_id INTEGER NOT NULL,
+    PRIMARY KEY (file_id, end_ms, duration_ms, artist_id, track_id)
+) WITHOUT ROWID;
+"""
+
+# Rows read at once when reading plays into columns
+_CHUNK_ROWS = 1 << 14
+
+# The month a play is counted in, chosen the same way as `utils.in_months`
+_MONTH = """
+strftime(
+    '%Y-%m',
+    CASE
+        WHEN end_ms - month_start_ms > month_start_ms - start_ms THEN end_ms
+        ELSE start_ms
+    END / 1000,
+    'unixepoch'
+)
+"""
+_MONTH_START_MS = "CAST(strftime('%s', end_ms / 1000, 'unixepoch', 'start of month') AS INTEGER) * 1000"
+
+_TOP_ARTISTS_BY = {"listens": "COUNT(*)", "duration": "SUM(duration_ms)"}
+
+
+class HistoryStore:
+    """
+    Listening history kept in a SQLite database
+
+    Plays are keyed by their end time, duration, artist and track, so adding the same play again does nothing, and
+    artist and track names are stored once each in their own tables. Times are wall clock times as recorded, like the
+    times of a `TrackTable` without a timezone, and the queries that filter on them use the index on end times. Which
+    plays each added file had is kept too, so the plays of some of the files can be read back on their own.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM plays").fetchone()[0]
+
+    def is_current(self, path: str) -> bool:
+        """Whether the file at `path` was added and hasn't changed since"""
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, digest FROM files WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        if Fingerprint(os.path.abspath(path), *row).same_stat(path):
+            return True
+        current = Fingerprint.of(path)
+        if current.digest != row[2]:
+            return False
+        with self._connection:
+            self._remember(current)
+        return True
+
+    def import_file(self, path: str, load: Callable[[str], TrackTable]) -> int:
+        """Adds the plays of the file at `path` unless it's current, returning how many of them are new"""
+        if self.is_current(path):
+            logger.info("Skipped importing %r, which hasn't changed", path)
+            return 0
+        fingerprint = Fingerprint.of(path)
+        return self.add(load(path), fingerprint)
+
+    def add(self, tracks: TrackTable, fingerprint: Optional[Fingerprint] = None) -> int:
+        """
+        Adds the plays in `tracks` that aren't stored yet, returning how many there were
+
+        With a `fingerprint`, the plays are recorded as those of its file, replacing whatever it had before. Plays it had
+        before that no file has any more are removed.
+        """
+        if tracks.timezone is not None:
+            raise ValueError("Only tables of recorded times can be stored")
+        start = time.perf_counter()
+        with self._connection:
+            artist_ids = self._ids("artists", tracks.artists)
+            track_ids = self._ids("tracks", tracks.tracks)
+            keys = list(
+                zip(
+                    tracks.end.tolist(),
+                    tracks.duration.tolist(),
+                    artist_ids[tracks.artist].tolist(),
+                    track_ids[tracks.track].tolist(),
+                )
+            )
+            changes = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT INTO plays (end_ms, duration_ms, artist_id, track_id, start_ms) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT DO NOTHING",
+                ((*key, start_ms) for key, start_ms in zip(keys, tracks.start.tolist())),
+            )
+            added = self._connection.total_changes - changes
+            if fingerprint is not None:
+                file_id = self._remember(fingerprint)
+                dropped = set(
+                    self._connection.execute(
+                        "SELECT end_ms, duration_ms, artist_id, track_id FROM file_plays WHERE file_id = ?", (file_id,)
+                    )
+                ).difference(keys)
+                self._connection.execute("DELETE FROM file_plays WHERE file_id = ?", (file_id,))
+                self._connection.executemany(
+                    "INSERT INTO file_plays (file_id, end_ms, duration_ms, artist_id, track_id) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT DO NOTHING",
+                    ((file_id, *key) for key in keys),
+                )
+                self._connection.executemany(
+                    """
+                    DELETE FROM plays
+                    WHERE end_ms = ?1 AND duration_ms = ?2 AND artist_id = ?3 AND track_id = ?4 AND NOT EXISTS (
+                        SELECT 1 FROM file_plays
+                        WHERE end_ms = ?1 AND duration_ms = ?2 AND artist_id = ?3 AND track_id = ?4
+                    )
+                    """,
+                    dropped,
+                )
+        logger.info("Stored %d new plays of %d in %.2fs", added, len(tracks), time.perf_counter() - start)
+        return added
+
+    def tracks(
+        self, start: Optional[int] = None, end: Optional[int] = None, *, files: Optional[Sequence[str]] = None
+    ) -> TrackTable:
+        """
+        The plays starting at or after `start` and ending at or before `end`, like `TrackTable.between`
+
+        With `files`, only the plays of those of them that were added are read.
+        """
+        where, parameters = _between(start, end)
+        if files is not None:
+            where += " AND " if where else "WHERE "
+            where += f"""
+                (end_ms, duration_ms, artist_id, track_id) IN (
+                    SELECT end_ms, duration_ms, artist_id, track_id
+                    FROM file_plays JOIN files ON files.id = file_plays.file_id
+                    WHERE files.path IN ({", ".join("?" * len(files))})
+                )
+            """
+            parameters += tuple(os.path.abspath(path) for path in files)
+        # Read a chunk of rows at a time into columns sized up front, since a tuple for every row takes several times
+        # the memory of the columns. Counting and reading in one transaction keeps the count right.
+        with self._connection:
+            self._connection.execute("BEGIN")
+            count = self._connection.execute(f"SELECT COUNT(*) FROM plays {where}", parameters).fetchone()[0]
+            columns = np.empty((5, count), dtype=np.int64)
+            cursor = self._connection.execute(
+                f"SELECT start_ms, end_ms, duration_ms, artist_id, track_id FROM plays {where}", parameters
+            )
+            read = 0
+            while rows := cursor.fetchmany(_CHUNK_ROWS):
+                columns[:, read : read + len(rows)] = np.array(rows, dtype=np.int64).T
+                read += len(rows)
+        artist_ids, artist = np.unique(columns[3], return_inverse=True)
+        track_ids, track = np.unique(columns[4], return_inverse=True)
+        table = TrackTable(
+            start=columns[0],
+            end=columns[1],
+            duration=columns[2].astype(np.int32),
+            artist=artist.astype(np.int32),
+            track=track.astype(np.int32),
+            artists=self._names("artists", artist_ids),
+            tracks=self._names("tracks", track_ids),
+        )
+        # Sorts the table and its dictionaries the same way as loading the files would
+        return TrackTable.concatenate([table])
+
+    def top_artists(
+        self, by: str = "listens", start: Optional[int] = None, end: Optional[int] = None, limit: int = 20
+    ) -> List[Tuple[str, int]]:
+        """The artists with the most listens or the longest listen duration, with ties broken by who was heard first"""
+        where, parameters = _between(start, end)
+        return self._connection.execute(
+            f"""
+            SELECT artists.name, {_TOP_ARTISTS_BY[by]} AS value
+            FROM plays JOIN artists ON artists.id = plays.artist_id
+            {where}
+            GROUP BY plays.artist_id
+            ORDER BY value DESC, MIN(start_ms), artists.name
+            LIMIT ?
+            """,
+            (*parameters, limit),
+        ).fetchall()
+
+    def monthly_listens(self, start: Optional[int] = None, end: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """The month, listens and listen duration of each month that was listened in, from the latest"""
+        where, parameters = _between(start, end)
+        return self._connection.execute(
+            f"""
+            SELECT {_MONTH} AS month, COUNT(*), SUM(duration_ms)
+            FROM (SELECT start_ms, end_ms, duration_ms, {_MONTH_START_MS} AS month_start_ms FROM plays {where})
+            GROUP BY month
+            ORDER BY month DESC
+            """,
+            parameters,
+        ).fetchall()
+
+    def _ids(self, table: str, names: np.ndarray) -> np.ndarray:
+        """The ids of `names` in a dictionary table, adding the names that aren't in it yet"""
+        self._connection.executemany(
+            f"INSERT INTO {table} (name) VALUES (?) ON CONFLICT (name) DO NOTHING", ((name,) for name in names)
+        )
+        ids = dict(self._connection.execute(f"SELECT name, id FROM {table}"))
+        return np.array([ids[name] for name in names], dtype=np.int64)
+
+    def _names(self, table: str, ids: np.ndarray) -> np.ndarray:
+        names = dict(self._connection.execute(f"SELECT id, name FROM {table}"))
+        dictionary = np.empty(len(ids), dtype=object)
+        dictionary[:] = [names[id_] for id_ in ids.tolist()]
+        return dictionary
+
+    def _remember(self, fingerprint: Fingerprint) -> int:
+        """Records the fingerprint of a file, returning its id"""
+        self._connection.execute(
+            "INSERT INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, digest = excluded.digest",
+            (fingerprint.path, fingerprint.size, fingerprint.mtime_ns, fingerprint.digest),
+        )
+        return self._connection.execute("SELECT id FROM files WHERE path = ?", (fingerprint.path,)).fetchone()[0]
+
+
+def _between(start: Optional[int], end: Optional[int]) -> Tuple[str, Tuple[Any, ...]]:
+    conditions: List[str] = []
+    parameters: List[int] = []
+    if start is not None:
+        # Plays end after they start, so bounding the end as well lets the index on end times narrow the search
+        conditions.append("start_ms >= ? AND end_ms >= ?")
+        parameters.extend((start, start))
+    if end is not None:
+        conditions.append("end_ms <= ?")
+        parameters.append(end)
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), tuple(parameters)
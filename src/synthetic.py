@@ -0,0 +1,134 @@
+"""
+Writes made up streaming history exports, the same for the same arguments, for testing and benchmarking
+
+    python src/synthetic.py <directory> --plays 1000000 --artists 10000 --seed 0
+
+Artists are played with a Zipf-like popularity and each has a few favourite tracks, plays mostly happen in the
+evening, and about one in five is skipped after a few seconds. Plays are spread over the years before `--end` and
+written in time order, `--plays-per-file` to a file like Spotify's own exports.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from track import Track
+
+SCALES = {"10k": (10_000, 1_000), "1m": (1_000_000, 10_000), "10m": (10_000_000, 100_000)}
+
+_SYLLABLES = ("ka", "lo", "mi", "ren", "sa", "tor", "vel", "zu", "an", "bri", "cho", "del", "fin", "gar", "hol", "jun")
+_TRACKS_PER_ARTIST = 40
+_SKIPPED = 0.2
+# How likely a play is to end in each hour of the day
+_HOURS = np.array([2, 1, 1, 1, 1, 1, 2, 4, 5, 5, 5, 5, 6, 6, 5, 5, 6, 7, 8, 9, 9, 8, 6, 4], dtype=float)
+
+
+def _name(number: int) -> str:
+    """A made up word for each number, at least two syllables long"""
+    number += len(_SYLLABLES)
+    syllables = []
+    while number:
+        number, digit = divmod(number, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[digit])
+    return "".join(syllables).capitalize()
+
+
+class HistoryGenerator:
+    """Plays of `artists` made up artists, generated a file at a time so histories of any size fit in memory"""
+
+    def __init__(self, artists: int, *, seed: int = 0, years: float = 5, end: str = "2021-01-01"):
+        self.artists = artists
+        self.seed = seed
+        self._end = np.datetime64(end, "m")
+        self._minutes = int(years * 365.25 * 24 * 60)
+        popularity = 1 / np.arange(1, artists + 1) ** 1.1
+        self._popularity = np.cumsum(popularity / popularity.sum())
+        self._artist_names = [f"The {_name(artist)}" for artist in range(artists)]
+        self._track_names: Dict[int, str] = {}
+
+    def plays(self, file: int, files: int, count: int) -> List[Track.JSON]:
+        """The `count` plays of file number `file` of `files`, which covers its share of the years in time order"""
+        rng = np.random.default_rng([self.seed, file])
+        first_day = (self._end - self._minutes).astype("datetime64[D]")
+        days = int(self._minutes // (24 * 60))
+        first, last = days * file // files, days * (file + 1) // files
+        day = first_day + rng.integers(first, max(last, first + 1), count)
+        minutes = rng.choice(24, count, p=_HOURS / _HOURS.sum()) * 60 + rng.integers(0, 60, count)
+        order = np.lexsort((minutes, day))
+        end_times = np.datetime_as_string(day[order].astype("datetime64[m]") + minutes[order], unit="m")
+
+        artist = np.searchsorted(self._popularity, rng.random(count), side="right").clip(max=self.artists - 1)
+        track = artist * _TRACKS_PER_ARTIST + np.minimum(rng.geometric(0.15, count) - 1, _TRACKS_PER_ARTIST - 1)
+        skipped = rng.random(count) < _SKIPPED
+        played = np.where(
+            skipped, rng.integers(500, 30_000, count), rng.lognormal(np.log(210_000), 0.25, count).astype(np.int64)
+        )
+        return [
+            {
+                "endTime": end_time.replace("T", " "),
+                "artistName": self._artist_names[artist_],
+                "trackName": self._track_name(track_),
+                "msPlayed": ms_played,
+            }
+            for end_time, artist_, track_, ms_played in zip(
+                end_times.tolist(), artist.tolist(), track.tolist(), played.tolist()
+            )
+        ]
+
+    def _track_name(self, track: int) -> str:
+        name = self._track_names.get(track)
+        if name is None:
+            name = self._track_names[track] = _name(track)
+        return name
+
+
+def write_history(
+    directory: str, plays: int, artists: int, *, seed: int = 0, plays_per_file: int = 10_000, **kwargs
+) -> List[str]:
+    """Writes a made up history of `plays` plays to `directory`, returning the paths of the files written"""
+    os.makedirs(directory, exist_ok=True)
+    generator = HistoryGenerator(artists, seed=seed, **kwargs)
+    files = max(-(-plays // plays_per_file), 1)
+    paths = []
+    for file in range(files):
+        count = plays // files + (file < plays % files)
+        path = os.path.join(directory, f"StreamingHistory{file}.json")
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(generator.plays(file, files, count), json_file, indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="synthetic", description="Writes made up Spotify streaming history")
+    parser.add_argument("directory", help="folder to write StreamingHistory*.json files to")
+    parser.add_argument("--scale", choices=SCALES, help="preset number of plays and artists")
+    parser.add_argument("--plays", type=int, help="number of plays (default: 10,000)")
+    parser.add_argument("--artists", type=int, help="number of artists (default: 1,000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the history (default: %(default)s)")
+    parser.add_argument("--years", type=float, default=5, help="years the plays span (default: %(default)s)")
+    parser.add_argument("--end", default="2021-01-01", help="date the history ends (default: %(default)s)")
+    parser.add_argument("--plays-per-file", type=int, default=10_000, help="(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    plays, artists = SCALES[args.scale or "10k"]
+    start = time.perf_counter()
+    paths = write_history(
+        args.directory,
+        args.plays or plays,
+        args.artists or artists,
+        seed=args.seed,
+        plays_per_file=args.plays_per_file,
+        years=args.years,
+        end=args.end,
+    )
+    print(f"Wrote {args.plays or plays:,d} plays to {len(paths)} files in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,19 @@
 import dataclasses
 import datetime
+import functools
+import re
 from typing import TypedDict
 
 from backports import zoneinfo
 
+_TIMESTAMP = re.compile("([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2})")
 
+
+@functools.lru_cache(maxsize=1 << 16)
 def _fmt_time(timestamp: str) -> datetime.datetime:
+    # Plays share minute resolution end times, so both the cache and the fixed format fast path avoid most strptime calls
+    if match := _TIMESTAMP.fullmatch(timestamp):
+        return datetime.datetime(*map(int, match.groups()))  # type: ignore
     return datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M")
 
 
@@ -0,0 +1,440 @@
+import array
+import dataclasses
+import datetime
+import functools
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+from backports import zoneinfo
+
+from track import Track, _fmt_time
+
+Rows = Union[slice, np.ndarray]
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MILLISECOND = datetime.timedelta(milliseconds=1)
+_UTC = zoneinfo.ZoneInfo("UTC")
+_DIGIT_COLUMNS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15]
+_SEPARATORS = {4: "-", 7: "-", 10: " ", 13: ":"}
+_END_TIME_BATCH = 1 << 16
+_DAY_MS = 86_400_000
+_TIMEZONE_CACHE_SIZE = 4
+# Guards the timezone cache of every table, since analyses of the same table can run on more than one thread
+_by_timezone_lock = threading.Lock()
+
+
+def to_ms(dt: datetime.datetime) -> int:
+    """Milliseconds since the epoch of the wall clock time of `dt`"""
+    return (dt.replace(tzinfo=None) - _EPOCH) // _MILLISECOND
+
+
+def from_ms(ms: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(milliseconds=int(ms))
+
+
+def end_times_to_ms(timestamps: Sequence[str]) -> np.ndarray:
+    """Converts `endTime` strings to milliseconds since the epoch in one pass, giving the same results as `_fmt_time`"""
+    strings = np.array(timestamps, dtype=str).reshape(-1)
+    digits = strings.astype("U16").view(np.uint32).reshape(-1, 16).astype(np.int64) - ord("0")
+    digit_columns = digits[:, _DIGIT_COLUMNS]
+    valid = (np.char.str_len(strings) == 16) & np.all((digit_columns >= 0) & (digit_columns < 10), axis=1)
+    for column, separator in _SEPARATORS.items():
+        valid &= digits[:, column] == ord(separator) - ord("0")
+    digits[~valid] = 0
+
+    def field(first: int, length: int) -> np.ndarray:
+        return digits[:, first : first + length] @ 10 ** np.arange(length - 1, -1, -1)
+
+    year, month, day, hour, minute = field(0, 4), field(5, 2), field(8, 2), field(11, 2), field(14, 2)
+    months = (year - 1970) * 12 + month - 1
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    month_length = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - month_start
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_length)
+    valid &= (hour < 24) & (minute < 60)
+
+    result = ((month_start + day - 1) * 1440 + hour * 60 + minute) * 60_000
+    for index in np.flatnonzero(~valid):
+        result[index] = to_ms(_fmt_time(str(strings[index])))
+    return result
+
+
+def _utc_offset(timezone: zoneinfo.ZoneInfo, ms: int) -> int:
+    offset = from_ms(ms).replace(tzinfo=_UTC).astimezone(timezone).utcoffset()
+    assert offset is not None  # Times converted to a timezone always have an offset
+    return offset // _MILLISECOND
+
+
+@functools.lru_cache(maxsize=64)
+def _offset_table(timezone: zoneinfo.ZoneInfo, first_year: int, last_year: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The UTC offsets of `timezone` from the start of `first_year` until the end of `last_year`
+
+    Returns the UTC times at which each offset starts along with the offsets, both in milliseconds. The zone is sampled
+    daily and each change is narrowed down to the second it happened.
+    """
+    span_start, span_end = (to_ms(datetime.datetime(year, 1, 1)) for year in (first_year, last_year + 1))
+    samples = list(range(span_start, span_end + _DAY_MS, _DAY_MS))
+    sampled_offsets = [_utc_offset(timezone, sample) for sample in samples]
+
+    transitions, offsets = [span_start], [sampled_offsets[0]]
+    for before, after, offset in zip(samples, samples[1:], sampled_offsets[1:]):
+        if offset != offsets[-1]:
+            # Invariant: the offset at `before` is the previous offset and the offset at `after` is the new one
+            while after - before > 1000:
+                middle = (before + after) // 2000 * 1000
+                if _utc_offset(timezone, middle) == offset:
+                    after = middle
+                else:
+                    before = middle
+            transitions.append(after)
+            offsets.append(offset)
+    return np.array(transitions, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def _utc_offsets(timezone: zoneinfo.ZoneInfo, utc_ms: np.ndarray) -> np.ndarray:
+    if not len(utc_ms):
+        return np.zeros(0, dtype=np.int64)
+    years = np.array([utc_ms.min(), utc_ms.max()]).astype("datetime64[ms]").astype("datetime64[Y]").astype(np.int64)
+    transitions, offsets = _offset_table(timezone, int(years[0]) + 1970, int(years[1]) + 1970)
+    return offsets[np.searchsorted(transitions, utc_ms, side="right") - 1]
+
+
+def _dictionary(names: Iterable[str]) -> np.ndarray:
+    values = list(names)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _merge_dictionaries(
+    dictionaries: Sequence[np.ndarray], codes: Sequence[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    names = np.concatenate([*dictionaries, _dictionary([])])
+    merged, inverse = np.unique(names, return_inverse=True)
+    remapped = []
+    offset = 0
+    for dictionary, table_codes in zip(dictionaries, codes):
+        remapped.append(inverse[offset : offset + len(dictionary)].astype(np.int32)[table_codes])
+        offset += len(dictionary)
+    return _dictionary(merged), np.concatenate([*remapped, np.empty(0, dtype=np.int32)])
+
+
+@dataclasses.dataclass(frozen=True)
+class _TimeIndex:
+    order: Optional[np.ndarray]  # Rows sorted by start, or None if the table already is
+    starts: np.ndarray
+    end_ceilings: np.ndarray  # The latest end of any row up to each position, so non-decreasing
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class TrackTable:
+    """
+    Columnar storage for a listening history
+
+    `start` and `end` are wall clock times in milliseconds since the epoch (UTC unless `timezone` is set), `duration`
+    is the milliseconds played, and `artist`/`track` are codes into the `artists`/`tracks` dictionaries.
+    """
+
+    start: np.ndarray
+    end: np.ndarray
+    duration: np.ndarray
+    artist: np.ndarray
+    track: np.ndarray
+    artists: np.ndarray
+    tracks: np.ndarray
+    timezone: Optional[zoneinfo.ZoneInfo] = None
+    _by_timezone: Dict[zoneinfo.ZoneInfo, "TrackTable"] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    @classmethod
+    def empty(cls) -> "TrackTable":
+        return TrackTableBuilder().build()
+
+    @classmethod
+    def from_json(cls, objects: Iterable[Track.JSON]) -> "TrackTable":
+        builder = TrackTableBuilder()
+        for obj in objects:
+            builder.add(obj)
+        return builder.build()
+
+    @classmethod
+    def concatenate(cls, tables: Sequence["TrackTable"]) -> "TrackTable":
+        """Merges tables into one table sorted by start time with duplicate plays removed"""
+        artists, artist = _merge_dictionaries([table.artists for table in tables], [table.artist for table in tables])
+        tracks, track = _merge_dictionaries([table.tracks for table in tables], [table.track for table in tables])
+        return TrackTable(
+            start=np.concatenate([table.start for table in tables] + [np.empty(0, dtype=np.int64)]),
+            end=np.concatenate([table.end for table in tables] + [np.empty(0, dtype=np.int64)]),
+            duration=np.concatenate([table.duration for table in tables] + [np.empty(0, dtype=np.int32)]),
+            artist=artist,
+            track=track,
+            artists=artists,
+            tracks=tracks,
+        ).deduplicated()
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray]) -> "TrackTable":
+        return TrackTable(
+            start=arrays["start"],
+            end=arrays["end"],
+            duration=arrays["duration"],
+            artist=arrays["artist"],
+            track=arrays["track"],
+            artists=_dictionary(arrays["artists"].tolist()),
+            tracks=_dictionary(arrays["tracks"].tolist()),
+        )
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """The columns of this table with the dictionaries as unicode arrays, suitable for `numpy.savez`"""
+        return {
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "artist": self.artist,
+            "track": self.track,
+            "artists": np.array(self.artists.tolist(), dtype=str),
+            "tracks": np.array(self.tracks.tolist(), dtype=str),
+        }
+
+    def deduplicated(self) -> "TrackTable":
+        order = np.lexsort((self.track, self.artist, self.duration, self.end, self.start))
+        columns = [column[order] for column in (self.start, self.end, self.duration, self.artist, self.track)]
+        duplicate = np.zeros(len(order), dtype=bool)
+        duplicate[1:] = True
+        for column in columns:
+            duplicate[1:] &= column[1:] == column[:-1]
+        return self._replace(*(column[~duplicate] for column in columns))
+
+    def compacted(self) -> "TrackTable":
+        """This table with only the names it uses left in its dictionaries"""
+        artists, artist = np.unique(self.artist, return_inverse=True)
+        tracks, track = np.unique(self.track, return_inverse=True)
+        return dataclasses.replace(
+            self,
+            artist=artist.astype(np.int32),
+            track=track.astype(np.int32),
+            artists=self.artists[artists],
+            tracks=self.tracks[tracks],
+        )
+
+    def take(self, rows: Rows) -> "TrackTable":
+        return self._replace(self.start[rows], self.end[rows], self.duration[rows], self.artist[rows], self.track[rows])
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> "TrackTable":
+        """The plays starting at or after `start` and ending at or before `end`"""
+        return self.take(self.rows_between(start, end))
+
+    def rows_between(self, start: Optional[int] = None, end: Optional[int] = None) -> Rows:
+        """The rows of `between` found by binary search, as a slice when they are contiguous or else sorted row numbers"""
+        index = self._time_index
+        first = 0 if start is None else int(np.searchsorted(index.starts, start, side="left"))
+        if end is None:
+            settled = last = len(self)
+        else:
+            last = int(np.searchsorted(index.starts, end, side="right"))
+            # Every play before `settled` ends in range, plays after it may still overlap `end` so are checked one by one
+            settled = max(first, min(last, int(np.searchsorted(index.end_ceilings, end, side="right"))))
+
+        if index.order is None:
+            unsettled = np.arange(settled, last)
+            unsettled = unsettled[self.end[unsettled] <= end]
+            if not len(unsettled):
+                return slice(first, settled)
+            return np.concatenate([np.arange(first, settled), unsettled])
+        unsettled = index.order[settled:last]
+        unsettled = unsettled[self.end[unsettled] <= end]
+        return np.sort(np.concatenate([index.order[first:settled], unsettled]))
+
+    @functools.cached_property
+    def _time_index(self) -> _TimeIndex:
+        if np.all(self.start[1:] >= self.start[:-1]):
+            return _TimeIndex(order=None, starts=self.start, end_ceilings=np.maximum.accumulate(self.end))
+        order = np.argsort(self.start, kind="stable")
+        return _TimeIndex(order=order, starts=self.start[order], end_ceilings=np.maximum.accumulate(self.end[order]))
+
+    @functools.cached_property
+    def fingerprint(self) -> str:
+        """A digest of the contents of this table, the same for tables holding the same plays"""
+        digest = hashlib.sha1(str(self.timezone).encode())
+        for column in (self.start, self.end, self.duration, self.artist, self.track):
+            digest.update(np.ascontiguousarray(column).data)
+        for dictionary in (self.artists, self.tracks):
+            digest.update("\0".join(dictionary).encode())
+        return digest.hexdigest()
+
+    def to_timezone(self, timezone: zoneinfo.ZoneInfo) -> "TrackTable":
+        """Converts the UTC times of this table into wall clock times of `timezone`, caching the result per zone"""
+        with _by_timezone_lock:
+            converted = self._by_timezone.get(timezone)
+        if converted is None:
+            converted = dataclasses.replace(
+                self,
+                start=self.start + _utc_offsets(timezone, self.start),
+                end=self.end + _utc_offsets(timezone, self.end),
+                timezone=timezone,
+            )
+            with _by_timezone_lock:
+                if timezone not in self._by_timezone and len(self._by_timezone) >= _TIMEZONE_CACHE_SIZE:
+                    del self._by_timezone[next(iter(self._by_timezone))]
+                self._by_timezone[timezone] = converted
+        return converted
+
+    def artist_names(self) -> List[str]:
+        """Names of the artists that appear in this table"""
+        return list(self.artists[np.unique(self.artist)])
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __iter__(self) -> Iterator[Track]:
+        for index in range(len(self)):
+            yield self._track_at(index)
+
+    @overload
+    def __getitem__(self, item: int) -> Track:
+        ...
+
+    @overload
+    def __getitem__(self, item: Rows) -> "TrackTable":
+        ...
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._track_at(int(item))
+        return self.take(item)
+
+    def _track_at(self, index: int) -> Track:
+        start, end = from_ms(self.start[index]), from_ms(self.end[index])
+        if self.timezone is not None:
+            start, end = start.replace(tzinfo=self.timezone), end.replace(tzinfo=self.timezone)
+        return Track(
+            artist=self.artists[self.artist[index]],
+            track=self.tracks[self.track[index]],
+            start=start,
+            end=end,
+            duration=datetime.timedelta(milliseconds=int(self.duration[index])),
+        )
+
+    def _replace(
+        self, start: np.ndarray, end: np.ndarray, duration: np.ndarray, artist: np.ndarray, track: np.ndarray
+    ) -> "TrackTable":
+        return dataclasses.replace(self, start=start, end=end, duration=duration, artist=artist, track=track)
+
+
+class TrackView:
+    """
+    A lazy selection of rows from a shared base table
+
+    Filters narrow a view by composing row selections over the base, and the selected rows are only gathered into a
+    table the first time `table` is used. Contiguous selections stay slices, so their tables share the base's memory.
+    """
+
+    def __init__(self, base: TrackTable, rows: Union[Rows, range] = slice(None)):
+        self.base = base
+        self.rows = _normalized_rows(rows, len(base))
+        self._table: Optional[TrackTable] = None
+
+    def __len__(self) -> int:
+        return self.rows.stop - self.rows.start if isinstance(self.rows, slice) else len(self.rows)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TrackView) or self.base is not other.base:
+            return NotImplemented
+        if isinstance(self.rows, slice) and isinstance(other.rows, slice):
+            return self.rows == other.rows
+        if isinstance(self.rows, np.ndarray) and isinstance(other.rows, np.ndarray):
+            return bool(np.array_equal(self.rows, other.rows))
+        return False
+
+    @property
+    def table(self) -> TrackTable:
+        if self._table is None:
+            # Keeping the base itself when every row is selected lets anything cached on it be reused
+            everything = isinstance(self.rows, slice) and len(self) == len(self.base)
+            self._table = self.base if everything else self.base.take(self.rows)
+        return self._table
+
+    def where(self, selection: Rows) -> "TrackView":
+        """Narrows this view by a boolean mask, increasing row numbers or slice over the rows of this view"""
+        if isinstance(self.rows, slice):
+            if isinstance(selection, slice):
+                return TrackView(self.base, range(self.rows.start, self.rows.stop)[selection])
+            return TrackView(self.base, np.arange(self.rows.start, self.rows.stop)[selection])
+        return TrackView(self.base, self.rows[selection])
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> "TrackView":
+        return self._intersect(self.base.rows_between(start, end))
+
+    def to_timezone(self, timezone: zoneinfo.ZoneInfo) -> "TrackView":
+        # Conversion keeps the order of rows, so the selection carries over to the converted base as is
+        return TrackView(self.base.to_timezone(timezone), self.rows)
+
+    def _intersect(self, rows: Rows) -> "TrackView":
+        rows = _normalized_rows(rows, len(self.base))
+        if isinstance(self.rows, slice):
+            if isinstance(rows, slice):
+                start = max(self.rows.start, rows.start)
+                return TrackView(self.base, slice(start, max(start, min(self.rows.stop, rows.stop))))
+            return TrackView(self.base, _rows_within(rows, self.rows))
+        if isinstance(rows, slice):
+            return TrackView(self.base, _rows_within(self.rows, rows))
+        return TrackView(self.base, np.intersect1d(self.rows, rows, assume_unique=True))
+
+
+def _rows_within(numbers: np.ndarray, bounds: slice) -> np.ndarray:
+    """The increasing row `numbers` that are within the contiguous `bounds`"""
+    return numbers[np.searchsorted(numbers, bounds.start) : np.searchsorted(numbers, bounds.stop)]
+
+
+def _normalized_rows(rows: Union[Rows, range], length: int) -> Rows:
+    if isinstance(rows, slice):
+        rows = range(length)[rows]
+    if isinstance(rows, range):
+        if rows.step == 1:
+            return slice(rows.start, max(rows.start, rows.stop))
+        return np.arange(rows.start, rows.stop, rows.step)
+    rows = np.asarray(rows)
+    return np.flatnonzero(rows) if rows.dtype == bool else rows
+
+
+class TrackTableBuilder:
+    """Builds a `TrackTable` one JSON object at a time, keeping only the compact columns in memory"""
+
+    def __init__(self):
+        self._end_times: List[str] = []
+        self._ends = array.array("q")
+        self._durations = array.array("i")
+        self._artists = array.array("i")
+        self._tracks = array.array("i")
+        self._artist_codes: Dict[str, int] = {}
+        self._track_codes: Dict[str, int] = {}
+
+    def add(self, data: Track.JSON) -> None:
+        self._end_times.append(data["endTime"])
+        if len(self._end_times) == _END_TIME_BATCH:
+            self._convert_end_times()
+        self._durations.append(data["msPlayed"])
+        self._artists.append(self._artist_codes.setdefault(data["artistName"], len(self._artist_codes)))
+        self._tracks.append(self._track_codes.setdefault(data["trackName"], len(self._track_codes)))
+
+    def build(self) -> TrackTable:
+        self._convert_end_times()
+        end = np.frombuffer(self._ends, dtype=np.int64)
+        duration = np.frombuffer(self._durations, dtype=np.int32)
+        return TrackTable(
+            start=end - duration,
+            end=end,
+            duration=duration,
+            artist=np.frombuffer(self._artists, dtype=np.int32),
+            track=np.frombuffer(self._tracks, dtype=np.int32),
+            artists=_dictionary(self._artist_codes),
+            tracks=_dictionary(self._track_codes),
+        )
+
+    def _convert_end_times(self) -> None:
+        if self._end_times:
+            self._ends.frombytes(end_times_to_ms(self._end_times).tobytes())
+            self._end_times.clear()
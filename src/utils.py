@@ -1,9 +1,13 @@
-import collections
 import datetime
 import logging
-from typing import Any, Callable, Dict, Iterable, List, Sequence, Set, Tuple, Union
+from typing import Any, Iterable, Sequence, Tuple, Union
+
+import numpy as np
 
 from track import Track
+from tracktable import to_ms
+
+KERNELS = ("box", "exponential", "gaussian")
 
 
 def configure_logger(logger_name: str, file_name: str) -> None:
@@ -16,33 +20,46 @@ def configure_logger(logger_name: str, file_name: str) -> None:
     logger.handlers = [handler]
 
 
-def _start_of_month(dt: datetime.datetime) -> datetime.datetime:
-    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+def _pin(start: Union[int, np.ndarray], end: Union[int, np.ndarray], unit: str) -> np.ndarray:
+    start, end = np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64)
+    pinned_end = end.astype("datetime64[ms]").astype(f"datetime64[{unit}]")
+    pinned_end_ms = pinned_end.astype("datetime64[ms]").astype(np.int64)
+    pinned_start = start.astype("datetime64[ms]").astype(f"datetime64[{unit}]")
+    return np.where(end - pinned_end_ms > pinned_end_ms - start, pinned_end, pinned_start)
+
 
+def in_months(start: Union[int, np.ndarray], end: Union[int, np.ndarray]) -> np.ndarray:
+    """
+    The month each play is counted in, given its start and end as wall clock milliseconds since the epoch
 
-def _start_of_day(dt: datetime.datetime) -> datetime.datetime:
-    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    A play that crosses into a new month is counted in the month that most of it was played in, or the earlier month if
+    it's split evenly. Returns `datetime64[M]` values.
+    """
+    return _pin(start, end, "M")
 
 
-def _start_of_hour(dt: datetime.datetime) -> datetime.datetime:
-    return dt.replace(minute=0, second=0, microsecond=0)
+def in_days(start: Union[int, np.ndarray], end: Union[int, np.ndarray]) -> np.ndarray:
+    """Like `in_months` but for days, returning `datetime64[D]` values"""
+    return _pin(start, end, "D")
 
 
-def _pin(track: Track, pinner: Callable[[datetime.datetime], datetime.datetime]) -> datetime.datetime:
-    pinned_end = pinner(track.end)
-    return pinned_end if (track.end - pinned_end > pinned_end - track.start) else pinner(track.start)
+def in_hours(start: Union[int, np.ndarray], end: Union[int, np.ndarray]) -> np.ndarray:
+    """Like `in_months` but for hours, returning `datetime64[h]` values"""
+    return _pin(start, end, "h")
 
 
 def in_month(track: Track) -> datetime.date:
-    return _pin(track, _start_of_month).date()
+    return in_months(to_ms(track.start), to_ms(track.end)).astype("datetime64[D]").item()
 
 
 def in_day(track: Track) -> datetime.date:
-    return _pin(track, _start_of_day).date()
+    return in_days(to_ms(track.start), to_ms(track.end)).item()
 
 
-def in_hour(track: Track) -> datetime.date:
-    return _pin(track, _start_of_hour)
+def in_hour(track: Track) -> datetime.datetime:
+    return (
+        in_hours(to_ms(track.start), to_ms(track.end)).astype("datetime64[ms]").item().replace(tzinfo=track.end.tzinfo)
+    )
 
 
 def hours_minutes_seconds(duration: datetime.timedelta) -> Tuple[int, int, int]:
@@ -75,35 +92,54 @@ def pformat_table(
     return "\n".join(format_spec.format(*row) for row in processed)
 
 
-def moving_average(values: Sequence[float], distance: int) -> Sequence[float]:
-    averages = []
-
-    for i in range(len(values)):
-        total: Union[int, float] = 0
-        for offset in range(-distance // 2 + 1, distance // 2 + 1):
-            ind = i + offset
-            if ind < 0 or ind >= len(values):
-                ind = i - offset
-            total += values[ind]
-        averages.append(total / distance)
-
+def _kernel_weights(kernel: str, offsets: np.ndarray, distance: int) -> np.ndarray:
+    if kernel == "box":
+        weights = np.ones(len(offsets))
+    elif kernel == "exponential":
+        weights = np.exp(-4 * np.abs(offsets) / distance)
+    elif kernel == "gaussian":
+        weights = np.exp(-0.5 * (offsets / (distance / 4)) ** 2)
+    else:
+        raise ValueError(f"Unknown moving average kernel {kernel!r}, expected one of {KERNELS}")
+    return weights / weights.sum()
+
+
+def _mirrored_windows(length: int, positions: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # Window positions past either end are mirrored about the centre of the window, and clamped to the ends if the
+    # window is so long that even that is outside
+    indices = positions[:, np.newaxis] + offsets
+    indices = np.where((indices < 0) | (indices >= length), positions[:, np.newaxis] - offsets, indices)
+    return np.clip(indices, 0, length - 1)
+
+
+def moving_average(values: Union[Sequence[float], np.ndarray], distance: int, kernel: str = "box") -> np.ndarray:
+    """
+    Averages of `values` over a window of `distance` values around each one, along the last axis
+
+    Windows that reach past either end use the values mirrored about their centre instead. The "box" kernel weighs
+    each value in a window the same, while "exponential" and "gaussian" favour the values closest to the centre.
+    """
+    values = np.asarray(values, dtype=float)
+    offsets = np.arange(-distance // 2 + 1, distance // 2 + 1)
+    weights = _kernel_weights(kernel, offsets, distance)
+    length = values.shape[-1]
+    averages = np.empty_like(values)
+
+    # Windows of the interior positions are entirely inside `values`
+    first, last = min(-offsets[0], length), max(length - offsets[-1], 0)
+    if first < last:
+        if kernel == "box":
+            sums = np.cumsum(values, axis=-1)
+            sums = np.concatenate([np.zeros(values.shape[:-1] + (1,)), sums], axis=-1)
+            averages[..., first:last] = (
+                sums[..., first + offsets[-1] + 1 :] - sums[..., : last + offsets[0]]
+            ) / distance
+        else:
+            windows = np.lib.stride_tricks.sliding_window_view(values, distance, axis=-1)
+            averages[..., first:last] = windows @ weights
+
+    edges = np.concatenate([np.arange(0, first), np.arange(max(first, last), length)])
+    if len(edges):
+        windows = values[..., _mirrored_windows(length, edges, offsets)]
+        averages[..., edges] = windows.sum(axis=-1) / distance if kernel == "box" else windows @ weights
     return averages
-
-
-def listens_per_day(all_tracks: Iterable[Track]) -> Tuple[List[datetime.date], Dict[str, List[int]]]:
-    tracks_by_day: Dict[datetime.date, List[Track]] = collections.defaultdict(list)
-    for track in all_tracks:
-        tracks_by_day[in_day(track)].append(track)
-
-    artists: Set[str] = set(track.artist for track in all_tracks)
-    listens_each_day: Dict[str, List[int]] = collections.defaultdict(list)
-
-    for _day, tracks in tracks_by_day.items():
-        artist_to_tracks: Dict[str, List[Track]] = collections.defaultdict(list)
-        for track in tracks:
-            artist_to_tracks[track.artist].append(track)
-
-        for artist in artists:
-            listens_each_day[artist].append(len(artist_to_tracks[artist]))
-
-    return list(tracks_by_day.keys()), dict(listens_each_day)
@@ -0,0 +1,19 @@
+import pytest
+
+import plugins
+from analyzers import ANALYZERS
+from analyzers.totaltracks import TotalTracks
+from tracktable import TrackTable
+
+from .test_tracktable import OBJECTS
+
+
+@pytest.mark.parametrize("name, spec", ANALYZERS.items())
+def test_analyzers(name: str, spec: str):
+    assert plugins.import_spec(spec).name == name
+
+
+def test_total_tracks():
+    tracks = TrackTable.concatenate([TrackTable.from_json(OBJECTS)])
+    assert TotalTracks.compute(tracks) == "3 tracks listened to between 2020-07-06 and 2021-03-14"
+    assert TotalTracks.compute(tracks.between(0, 0)) == "0 tracks listened to"
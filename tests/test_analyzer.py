@@ -0,0 +1,218 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import analyzer
+
+PLAYS = [
+    {"endTime": "2020-07-06 23:59", "artistName": "A", "trackName": "One", "msPlayed": 1000},
+    {"endTime": "2020-07-07 01:03", "artistName": "B", "trackName": "Two", "msPlayed": 180000},
+    {"endTime": "2020-08-14 07:30", "artistName": "A", "trackName": "Three", "msPlayed": 3723456},
+]
+
+
+def test_report(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    output = tmp_path / "reports"
+
+    status = analyzer.main(
+        [
+            "report",
+            str(tmp_path / "data"),
+            "--output",
+            str(output),
+            "--config",
+            str(tmp_path / "config.toml"),
+            "--timezone",
+            "",
+            "--start",
+            "2020-07-07",
+            "--csv",
+            "-c",
+            "Top Artists by Listens",
+            "-c",
+            "Listens Per Day",
+        ]
+    )
+
+    assert status == 0
+    assert sorted(path.name for path in output.iterdir()) == [
+        "listens_per_day.csv",
+        "listens_per_day.png",
+        "top_artists_by_listens.csv",
+        "top_artists_by_listens.txt",
+    ]
+    assert (output / "top_artists_by_listens.txt").read_text() == "B: 1\nA: 1\n"
+    assert (output / "top_artists_by_listens.csv").read_text().splitlines() == ["B,1", "A,1"]
+    assert (output / "listens_per_day.png").read_bytes().startswith(b"\x89PNG")
+
+
+def test_report_stats(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+
+    status = analyzer.main(
+        [
+            "report",
+            str(tmp_path / "data"),
+            "--output",
+            str(tmp_path / "reports"),
+            "--config",
+            str(tmp_path / "config.toml"),
+            "--timezone",
+            "UTC",
+            "--stats",
+            str(tmp_path / "stats.json"),
+            "-c",
+            "Top Artists by Listens",
+        ]
+    )
+
+    assert status == 0
+    stats = json.loads((tmp_path / "stats.json").read_text())
+    for stage in ("load file", "filter Timezone", "compute Top Artists by Listens", "write Top Artists by Listens"):
+        assert stats[stage]["calls"] >= 1
+        assert stats[stage]["wall"] >= 0
+
+
+def _report_imports(tmp_path: Path, *components: str) -> str:
+    """Reports in a fresh interpreter, returning which gui and tkinter modules it imported"""
+    (tmp_path / "data").mkdir(exist_ok=True)
+    (tmp_path / "data" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    arguments = ["report", str(tmp_path / "data"), "--output", str(tmp_path / "reports")]
+    arguments += ["--config", str(tmp_path / "config.toml"), "--timezone", ""]
+    code = (
+        "import sys, analyzer; analyzer.main(sys.argv[1:]); "
+        "print(sorted(name for name in sys.modules if name.split('.')[0] in ('gui', 'tkinter')))"
+    )
+    return subprocess.run(
+        [sys.executable, "-c", code, *arguments, *(argument for name in components for argument in ("-c", name))],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()[-1]
+
+
+def test_report_imports(tmp_path: Path):
+    assert _report_imports(tmp_path, "Top Artists by Listens", "Monthly Listens", "Total Tracks") == "[]"
+    # matplotobjlib imports tkinter itself, but the window's widgets still aren't imported
+    assert "'gui" not in _report_imports(tmp_path, "Listens Per Day", "Weekly Color Mesh")
+
+
+def test_batch(tmp_path: Path):
+    for user, plays in (("alice", PLAYS), ("bob", PLAYS[1:]), ("carol", [])):
+        (tmp_path / "data" / user).mkdir(parents=True)
+        (tmp_path / "data" / user / "StreamingHistory0.json").write_text(json.dumps(plays))
+    output = tmp_path / "reports"
+
+    status = analyzer.main(
+        [
+            "batch",
+            str(tmp_path / "data"),
+            "--output",
+            str(output),
+            "--config",
+            str(tmp_path / "config.toml"),
+            "--timezone",
+            "",
+            "--processes",
+            "2",
+            "--csv",
+            "-c",
+            "Total Tracks",
+        ]
+    )
+
+    assert status == 0
+    assert (output / "alice" / "total_tracks.txt").exists()
+    assert (output / "bob" / "total_tracks.txt").exists()
+    assert not (output / "carol").exists()
+    assert (output / "summary_artists.csv").read_text().splitlines() == ["A,3,7447912,2", "B,2,360000,2"]
+    assert (output / "summary_months.csv").read_text().splitlines() == ["2020-08,2,7446912", "2020-07,3,361000"]
+    assert "July 2020:   3 listens 0 hours 6 minutes" in (output / "summary.txt").read_text()
+
+
+def _report_user_or_exit(user: str, *args) -> analyzer.UserSummary:
+    if user == "bob":
+        os._exit(1)
+    return _REPORT_USER(user, *args)
+
+
+_REPORT_USER = analyzer.report_user
+
+
+def test_batch_worker_exits(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    for user in ("alice", "bob", "carol", "dave"):
+        (tmp_path / "data" / user).mkdir(parents=True)
+        (tmp_path / "data" / user / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    output = tmp_path / "reports"
+    # Workers are forked, so they see the patched function
+    monkeypatch.setattr(analyzer, "report_user", _report_user_or_exit)
+
+    status = analyzer.main(
+        ["batch", str(tmp_path / "data"), "--output", str(output), "--config", str(tmp_path / "config.toml")]
+        + ["--timezone", "", "--processes", "1", "-c", "Total Tracks"]
+    )
+
+    # Carol fails too if she was already in the pool that bob's exit broke, and dave is reported on by a new pool
+    assert status == 1
+    failed = (output / "summary.txt").read_text().splitlines()[0].partition("failed: ")[2].split(", ")
+    assert "bob" in failed and set(failed) <= {"bob", "carol"}
+    assert not (output / "bob").exists()
+    assert (output / "alice" / "total_tracks.txt").exists()
+    assert (output / "dave" / "total_tracks.txt").exists()
+
+
+def test_batch_processes(tmp_path: Path, capsys: pytest.CaptureFixture):
+    with pytest.raises(SystemExit):
+        analyzer.main(["batch", str(tmp_path), "--processes", "0"])
+    assert "expected a positive number, not 0" in capsys.readouterr().err
+
+
+def test_report_partitioned(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    (tmp_path / "data" / "StreamingHistory1.json").write_text(json.dumps(PLAYS[1:] + [{**PLAYS[0], "artistName": "C"}]))
+    (tmp_path / "partitioned.toml").write_text("memory_budget_mb = 0\n")
+    components = ["Monthly Listens", "Top Artists by Listens", "Top Artists by Listen Duration", "Weekly Color Mesh"]
+
+    for output in ("whole", "partitioned"):
+        status = analyzer.main(
+            ["report", str(tmp_path / "data"), "--output", str(tmp_path / output)]
+            + ["--config", str(tmp_path / f"{output}.toml"), "--timezone", "Asia/Kolkata", "--csv"]
+            + [argument for component in components for argument in ("-c", component)]
+        )
+        assert status == 0
+
+    files = sorted(path.name for path in (tmp_path / "whole").iterdir())
+    assert len(files) == 7
+    assert sorted(path.name for path in (tmp_path / "partitioned").iterdir()) == files
+    for name in files:
+        assert (tmp_path / "partitioned" / name).read_bytes() == (tmp_path / "whole" / name).read_bytes()
+    assert (tmp_path / "whole" / "top_artists_by_listens.txt").read_text() == "A: 2\nC: 1\nB: 1\n"
+
+
+def test_report_partitioned_whole_history(tmp_path: Path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    (tmp_path / "config.toml").write_text("memory_budget_mb = 0\n")
+
+    status = analyzer.main(
+        [
+            "report",
+            str(tmp_path / "data"),
+            "--output",
+            str(tmp_path / "reports"),
+            "--config",
+            str(tmp_path / "config.toml"),
+        ]
+        + ["-c", "Total Tracks", "-c", "Monthly Listens"]
+    )
+    assert status == 1
+    assert [path.name for path in (tmp_path / "reports").iterdir()] == ["monthly_listens.txt"]
@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+import benchmark
+import synthetic
+from ingest import load_tracks
+
+
+def test_write_history(tmp_path: Path):
+    paths = synthetic.write_history(str(tmp_path / "a"), 2500, 50, seed=1, plays_per_file=1000)
+    assert [Path(path).name for path in paths] == [f"StreamingHistory{file}.json" for file in range(3)]
+    synthetic.write_history(str(tmp_path / "b"), 2500, 50, seed=1, plays_per_file=1000)
+    assert all((tmp_path / "b" / Path(path).name).read_bytes() == Path(path).read_bytes() for path in paths)
+
+    tracks = load_tracks(str(tmp_path / "a")).tracks
+    assert len(tracks) <= 2500 and len(tracks.artists) <= 50
+    assert (tracks.start[1:] >= tracks.start[:-1]).all()
+    plays = json.loads(Path(paths[0]).read_text())
+    assert plays == sorted(plays, key=lambda play: play["endTime"])
+
+
+def test_run_and_compare(tmp_path: Path):
+    output = tmp_path / "results.json"
+    assert benchmark.main(["run", "--plays", "2000", "--artists", "100", "--repeat", "1", "-o", str(output)]) == 0
+    results = json.loads(output.read_text())
+    names = [result["name"] for result in results["results"]]
+    assert {"load_tracks", "filter timezone", "listens_per_day", "moving_average box"} <= set(names)
+    assert "component Weekly Color Mesh" in names
+    assert all(result["seconds"] >= 0 and result["peak_bytes"] >= 0 for result in results["results"])
+
+    slower = dict(results, results=[dict(result, seconds=result["seconds"] * 2 + 1) for result in results["results"]])
+    assert benchmark.regressions(results, results, 1.25) == []
+    assert benchmark.regressions(results, slower, 1.25) == names
+    assert benchmark.regressions(results, slower, 1.25, min_seconds=10) == []
+    (tmp_path / "slower.json").write_text(json.dumps(slower))
+    assert benchmark.main(["compare", str(output), str(output)]) == 0
+    assert benchmark.main(["compare", str(output), str(tmp_path / "slower.json")]) == 1
@@ -0,0 +1,98 @@
+import collections
+import dataclasses
+import datetime
+from typing import List, Optional
+
+import numpy as np
+import pytest
+from backports import zoneinfo
+
+import utils
+from cube import DailyListens, ListenCube, Rollup
+from track import Track
+from tracktable import TrackTable
+
+OBJECTS: List[Track.JSON] = [
+    {"endTime": "2020-07-07 01:03", "artistName": "B", "trackName": "Two", "msPlayed": 3_840_000},
+    {"endTime": "2020-07-06 23:59", "artistName": "A", "trackName": "One", "msPlayed": 1000},
+    {"endTime": "2021-01-01 00:01", "artistName": "A", "trackName": "Three", "msPlayed": 180000},
+    {"endTime": "2021-01-01 00:03", "artistName": "B", "trackName": "Two", "msPlayed": 60000},
+    {"endTime": "2021-03-14 07:30", "artistName": "A", "trackName": "Three", "msPlayed": 3723456},
+    {"endTime": "2021-03-14 07:31", "artistName": "A", "trackName": "One", "msPlayed": 30000},
+]
+
+
+@pytest.mark.parametrize("zone", (None, "America/New_York", "Asia/Kolkata"))
+def test_rollup(zone: Optional[str]):
+    table = TrackTable.concatenate([TrackTable.from_json(OBJECTS)])
+    if zone is not None:
+        table = table.to_timezone(zoneinfo.ZoneInfo(zone))
+    cube = ListenCube.of(table)
+
+    expected: collections.Counter = collections.Counter()
+    for track in table:
+        expected[(utils.in_month(track), utils.in_day(track).weekday(), utils.in_hour(track).hour, track.artist)] += 1
+
+    months = cube.month.astype("datetime64[D]").tolist()
+    by_cell = cube.rollup(np.array(months), cube.weekday(), cube.hour_of_day(), cube.artist)
+    actual = {
+        (month, weekday, hour, table.artists[artist]): listens
+        for month, weekday, hour, artist, listens in zip(*by_cell.keys, by_cell.listens)
+    }
+    assert actual == expected
+    assert by_cell.duration.sum() == table.duration.sum()
+
+
+def test_cached():
+    table = TrackTable.from_json(OBJECTS)
+    assert ListenCube.of(table) is ListenCube.of(table)
+    assert ListenCube.of(table) is not ListenCube.of(table[:])
+
+
+def test_empty():
+    cube = ListenCube.of(TrackTable.empty())
+    assert len(cube.rollup(cube.artist).listens) == 0
+
+
+def test_daily_listens():
+    daily_listens = DailyListens.of(TrackTable.from_json(OBJECTS))
+
+    days = daily_listens.days.tolist()
+    assert days[0] == datetime.date(2020, 7, 6) and days[-1] == datetime.date(2021, 3, 14)
+    assert days == [days[0] + datetime.timedelta(days=day) for day in range(len(days))]
+
+    series = daily_listens.series(["A", "B", "C"])
+    expected = {"A": collections.Counter(), "B": collections.Counter()}
+    for track in TrackTable.from_json(OBJECTS):
+        expected[track.artist][utils.in_day(track)] += 1
+    for row, artist in enumerate(("A", "B")):
+        assert dict(zip(days, series[row].tolist())) == {day: expected[artist][day] for day in days}
+    assert not series[2].any()
+
+    assert daily_listens.most_in_a_day() == {"A": 2, "B": 1}
+
+
+def test_daily_listens_empty():
+    daily_listens = DailyListens.of(TrackTable.empty())
+    assert len(daily_listens.days) == 0
+    assert daily_listens.series(["A"]).shape == (1, 0)
+    assert daily_listens.most_in_a_day() == {}
+
+
+def test_merge_rollups():
+    table = TrackTable.concatenate([TrackTable.from_json(OBJECTS)])
+    cube = ListenCube.of(table)
+    expected = cube.rollup(cube.month, cube.artist)
+
+    rollups = []
+    for rows in (slice(0, 3), slice(3, 4), slice(4, None)):
+        part = ListenCube.build(table[rows])
+        rollup = part.rollup(part.month, part.artist)
+        rollups.append(dataclasses.replace(rollup, first_row=rollup.first_row + rows.start))
+    merged = Rollup.merge(rollups)
+
+    for actual, wanted in zip(
+        (*merged.keys, merged.listens, merged.duration, merged.first_row),
+        (*expected.keys, expected.listens, expected.duration, expected.first_row),
+    ):
+        assert actual.tolist() == wanted.tolist()
@@ -0,0 +1,26 @@
+import io
+import json
+
+import pytest
+
+from ingest import iter_json_array
+
+
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 7, 1 << 16))
+@pytest.mark.parametrize(
+    "text",
+    (
+        "[]",
+        " [ ]\n",
+        '[1, 2.5, "a]", {"x": [1, 2]}, null, true]',
+        '[12345678901234567890 ,\n{"endTime": "2020-07-07 01:03", "artistName": "Ñandú"}, 1e10, -3]',
+    ),
+)
+def test_iter_json_array(text: str, chunk_size: int):
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ("", "{}", "[1", "[1,", "[1 2]", "[1,]"))
+def test_iter_json_array_invalid(text: str):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
@@ -0,0 +1,89 @@
+import sys
+import threading
+import tracemalloc
+
+import pytest
+
+from instrumentation import RECORDER, Recorder, StageStats, format_table, summary, trace_memory
+
+
+def test_stages():
+    recorder = Recorder()
+    with recorder.collect() as outer:
+        for _ in range(2):
+            with recorder.stage("load"):
+                with recorder.collect() as inner:
+                    with recorder.stage("parse"):
+                        pass
+        with pytest.raises(ValueError):
+            with recorder.stage("analyze"):
+                raise ValueError
+
+    assert list(inner) == ["parse"]
+    assert inner["parse"].calls == 1
+    assert {name: stats.calls for name, stats in outer.items()} == {"parse": 2, "load": 2, "analyze": 1}
+    assert outer["load"].wall >= outer["parse"].wall
+    assert recorder.totals() == outer
+    assert all(stats.peak_bytes is None for stats in outer.values())
+
+    recorder.reset()
+    assert recorder.totals() == {}
+
+
+def test_collect_other_threads():
+    recorder = Recorder()
+
+    def run():
+        with recorder.stage("elsewhere"):
+            pass
+
+    with recorder.collect() as collected:
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        recorder.add({"worker": StageStats(calls=3, wall=1.5, cpu=1.0, peak_bytes=10)})
+        recorder.add({"worker": StageStats(calls=1, wall=0.5, cpu=0.25, peak_bytes=20)})
+
+    assert collected == {"worker": StageStats(calls=4, wall=2.0, cpu=1.25, peak_bytes=20)}
+    assert set(recorder.totals()) == {"elsewhere", "worker"}
+    assert summary(collected) == "worker 2.00s (4x)"
+    assert format_table(collected).splitlines()[1].startswith("worker")
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="tracemalloc.reset_peak needs Python 3.9")
+def test_peak_bytes():
+    recorder = Recorder(measure_memory=True)
+    tracemalloc.start()
+    try:
+        with recorder.collect() as collected:
+            with recorder.stage("outer"):
+                with recorder.stage("big"):
+                    data = bytearray(4 << 20)
+                    del data
+                with recorder.stage("small"):
+                    data = bytearray(1 << 10)
+                    del data
+    finally:
+        tracemalloc.stop()
+
+    assert collected["big"].peak_bytes >= 4 << 20
+    assert collected["small"].peak_bytes < 1 << 20
+    assert collected["outer"].peak_bytes >= collected["big"].peak_bytes
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="tracemalloc.reset_peak needs Python 3.9")
+def test_tracing_elsewhere():
+    recorder = Recorder()
+    tracemalloc.start()
+    try:
+        # Tracing that was started elsewhere keeps its peak, and isn't stopped by turning off tracing stages
+        trace_memory(True)
+        data = bytearray(4 << 20)
+        del data
+        with recorder.stage("after"), RECORDER.stage("after"):
+            pass
+        trace_memory(False)
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= 4 << 20
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,60 @@
+import json
+import os
+from typing import List
+
+from parsecache import ParseCache
+from tracktable import TrackTable
+
+OBJECTS = [
+    {"endTime": "2020-07-07 01:03", "artistName": "B", "trackName": "Two", "msPlayed": 180000},
+    {"endTime": "2020-07-06 23:59", "artistName": "A", "trackName": "One", "msPlayed": 1000},
+]
+
+
+class CountingParser:
+    def __init__(self):
+        self.parsed: List[str] = []
+
+    def __call__(self, path: str) -> TrackTable:
+        self.parsed.append(path)
+        with open(path, "rb") as file:
+            return TrackTable.from_json(json.load(file))
+
+
+def test_load(tmp_path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(OBJECTS))
+    parser = CountingParser()
+
+    first = ParseCache(str(tmp_path / "cache")).load(str(path), parser)
+    second = ParseCache(str(tmp_path / "cache")).load(str(path), parser)
+
+    assert parser.parsed == [str(path)]
+    assert list(first) == list(second) == list(TrackTable.from_json(OBJECTS))
+
+
+def test_touched_file_is_revalidated(tmp_path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(OBJECTS))
+    parser = CountingParser()
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    cache.load(str(path), parser)
+    os.utime(path, ns=(0, 0))
+    cache.load(str(path), parser)
+
+    assert len(parser.parsed) == 1
+
+
+def test_changed_file_is_parsed(tmp_path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(OBJECTS))
+    parser = CountingParser()
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    cache.load(str(path), parser)
+    path.write_text(json.dumps(OBJECTS[:1]))
+    table = cache.load(str(path), parser)
+
+    assert len(parser.parsed) == 2
+    assert list(table) == list(TrackTable.from_json(OBJECTS[:1]))
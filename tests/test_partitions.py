@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from partitions import MonthPartitions
+from tracktable import TrackTable
+
+from .test_cube import OBJECTS
+
+
+def test_partitions(tmp_path: Path):
+    tables = [TrackTable.from_json(OBJECTS[2:]), TrackTable.from_json(OBJECTS[:4])]
+    partitions = MonthPartitions(str(tmp_path), memory_budget=100)
+    for table in tables:
+        partitions.add(table)
+
+    assert partitions.months() == ["2020-07", "2020-12", "2021-01", "2021-03"]
+    assert len(list(tmp_path.iterdir())) == 6
+    expected = TrackTable.concatenate(tables)
+    assert [track for partition in partitions for track in partition] == list(expected)
+    assert all(partition.artist_names() == sorted(partition.artists) for partition in partitions)
+
+
+def test_partitions_buffered(tmp_path: Path):
+    partitions = MonthPartitions(str(tmp_path), memory_budget=1 << 20)
+    partitions.add(TrackTable.from_json(OBJECTS))
+    assert not list(tmp_path.iterdir())
+    assert sum(len(partition) for partition in partitions) == len(OBJECTS)
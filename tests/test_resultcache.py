@@ -0,0 +1,50 @@
+import numpy as np
+
+from resultcache import ResultCache, approximate_size
+
+
+def test_approximate_size():
+    array = np.zeros(1000)
+    assert approximate_size(array) >= array.nbytes
+    assert approximate_size([array, array]) < 2 * array.nbytes
+    assert approximate_size({"values": array[10:]}) >= array.nbytes
+
+
+def test_approximate_size_object_array():
+    names = np.array([f"artist {index}" for index in range(1000)], dtype=object)
+    # The names aren't walked, only the pointers to them are counted
+    assert names.nbytes <= approximate_size(names) < names.nbytes + 1000
+
+
+def test_hits_and_misses():
+    cache = ResultCache(1 << 20)
+    assert cache.get("a") is None
+    cache.put("a", "result")
+    assert cache.get("a") == "result"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    size = approximate_size(np.zeros(1000))
+    cache = ResultCache(3 * size)
+    for key in "abc":
+        cache.put(key, np.zeros(1000))
+    cache.get("a")
+    cache.put("d", np.zeros(1000))
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.bytes <= cache.max_bytes
+
+
+def test_given_size():
+    cache = ResultCache(1000)
+    cache.put("a", np.zeros(10), size=600)
+    cache.put("b", np.zeros(10), size=600)
+    assert len(cache) == 1 and cache.bytes == 600
+
+
+def test_too_big_is_not_kept():
+    cache = ResultCache(100)
+    cache.put("a", np.zeros(1000))
+    assert len(cache) == 0
@@ -0,0 +1,59 @@
+from gui.searchablecombobox import PrefixIndex
+
+VALUES = ["beta", "Alpha", "alphabet", "Gamma", "The Beatles", "delta"]
+
+
+def test_match_prefix():
+    index = PrefixIndex(VALUES)
+    assert list(index) == ["Alpha", "alphabet", "beta", "delta", "Gamma", "The Beatles"]
+    assert index.match("ALP") == (0, "Alpha")
+    assert index.match("g") == (4, "Gamma")
+    assert index.match("") == (0, "Alpha")
+
+
+def test_match_substring():
+    index = PrefixIndex(VALUES)
+    assert index.match("beat") == (5, "The Beatles")
+    assert index.match("elt") == (3, "delta")
+    assert index.match("zeta") is None
+    assert index.match("a\nb") is None
+
+
+def test_exclude_include():
+    index = PrefixIndex(VALUES)
+    index.exclude("Alpha")
+    index.exclude("delta")
+    index.exclude("missing")
+    assert len(index) == 4
+    assert list(index) == ["alphabet", "beta", "Gamma", "The Beatles"]
+    assert index.match("alp") == (0, "alphabet")
+    assert index.match("elt") is None
+    assert index.position("Gamma") == 2
+    assert index.position("delta") is None
+
+    index.include("delta")
+    index.include("delta")
+    assert index.position("delta") == 2
+    assert index.match("d") == (2, "delta")
+    assert len(index) == 5
+
+
+def test_listed_from():
+    index = PrefixIndex(VALUES)
+    index.exclude("beta")
+    index.exclude("delta")
+    assert index.listed_from("alphabet", 3) == ["alphabet", "Gamma", "The Beatles"]
+    assert index.listed_from("Gamma", 10) == ["Gamma", "The Beatles"]
+    assert index.listed_from("Alpha", 1) == ["Alpha"]
+
+
+def test_match_past_excluded_run():
+    values = [f"artist {number:06d}" for number in range(100_000)]
+    index = PrefixIndex(values)
+    for value in values[:60_000] + values[60_001:60_010]:
+        index.exclude(value)
+    assert index.match("artist") == (0, "artist 060000")
+    assert index.match("artist 0600") == (0, "artist 060000")
+    assert index.match("artist 06001") == (1, "artist 060010")
+    assert index.listed_from("artist 060000", 3) == ["artist 060000", "artist 060010", "artist 060011"]
+    assert index.match("artist 05") is None
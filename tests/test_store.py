@@ -0,0 +1,148 @@
+import datetime
+import json
+from pathlib import Path
+
+import pytest
+
+from analyzers.topartists import _by_artist, _top_artists
+from cube import ListenCube
+from ingest import load_tracks, load_tracks_file
+from store import HistoryStore
+from tracktable import TrackTable, to_ms
+
+from .test_tracktable import OBJECTS
+
+PLAYS = OBJECTS + [
+    {"endTime": "2020-08-01 00:02", "artistName": "C", "trackName": "Four", "msPlayed": 240000},
+    {"endTime": "2020-07-31 23:59", "artistName": "C", "trackName": "Four", "msPlayed": 240000},
+    {"endTime": "2020-07-07 02:00", "artistName": "C", "trackName": "Five", "msPlayed": 1000},
+]
+
+
+@pytest.fixture(name="store")
+def store_fixture(tmp_path: Path):
+    with HistoryStore(str(tmp_path / "history.sqlite3")) as store:
+        yield store
+
+
+def test_add(store: HistoryStore):
+    table = TrackTable.from_json(PLAYS)
+    assert store.add(table) == len(PLAYS) - 1
+    assert store.add(table[2:]) == 0
+    assert store.add(TrackTable.from_json(OBJECTS[:1] + [{**OBJECTS[0], "trackName": "Six"}])) == 1
+    assert len(store) == len(PLAYS)
+
+
+@pytest.mark.parametrize(
+    "start, end", ((None, None), ("2020-07-07 00:00", None), (None, "2020-07-31 23:59"), ("2020-07-07", "2020-08-01"))
+)
+def test_queries(store: HistoryStore, start: str, end: str):
+    table = TrackTable.concatenate([TrackTable.from_json(PLAYS)])
+    store.add(table)
+    start_ms = to_ms(datetime.datetime.fromisoformat(start)) if start else None
+    end_ms = to_ms(datetime.datetime.fromisoformat(end)) if end else None
+    expected = table.between(start_ms, end_ms)
+
+    assert list(store.tracks(start_ms, end_ms)) == list(expected)
+    for by in ("listens", "duration"):
+        assert store.top_artists(by, start_ms, end_ms) == list(_top_artists(_by_artist(expected, 0), by))
+    cube = ListenCube.of(expected)
+    months = cube.rollup(cube.month)
+    assert (
+        store.monthly_listens(start_ms, end_ms)
+        == [
+            (str(month), int(listens), int(duration))
+            for month, listens, duration in zip(months.keys[0], months.listens, months.duration)
+        ][::-1]
+    )
+
+
+def test_import_file(store: HistoryStore, tmp_path: Path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(OBJECTS))
+    assert store.import_file(str(path), load_tracks_file) == 3
+    assert store.is_current(str(path))
+    assert store.import_file(str(path), load_tracks_file) == 0
+
+    path.write_text(json.dumps(PLAYS))
+    assert not store.is_current(str(path))
+    assert store.import_file(str(path), load_tracks_file) == 3
+
+
+def test_import_file_with_removed_plays(store: HistoryStore, tmp_path: Path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(PLAYS))
+    store.import_file(str(path), load_tracks_file)
+    # The other file keeps one of the plays removed from the first
+    (tmp_path / "StreamingHistory1.json").write_text(json.dumps(PLAYS[-2:-1]))
+    store.import_file(str(tmp_path / "StreamingHistory1.json"), load_tracks_file)
+
+    path.write_text(json.dumps(PLAYS[:-2]))
+    assert store.import_file(str(path), load_tracks_file) == 0
+    expected = TrackTable.concatenate([TrackTable.from_json(PLAYS[:-1])])
+    assert len(store) == len(expected)
+    assert list(store.tracks()) == list(expected)
+    for by in ("listens", "duration"):
+        assert store.top_artists(by) == list(_top_artists(_by_artist(expected, 0), by))
+    cube = ListenCube.of(expected)
+    months = cube.rollup(cube.month)
+    expected_months = [
+        (str(month), int(listens), int(duration))
+        for month, listens, duration in zip(months.keys[0], months.listens, months.duration)
+    ]
+    assert store.monthly_listens() == expected_months[::-1]
+
+
+def test_load_tracks(tmp_path: Path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "StreamingHistory0.json").write_text(json.dumps(OBJECTS))
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "StreamingHistory0.json").write_text(json.dumps(PLAYS))
+    store_path = str(tmp_path / "history.sqlite3")
+
+    for path in (tmp_path / "a", tmp_path, tmp_path, tmp_path / "b"):
+        expected = load_tracks(str(path)).tracks
+        assert load_tracks(str(path), store_path=store_path).tracks.fingerprint == expected.fingerprint
+
+
+def test_load_tracks_on_file(tmp_path: Path):
+    (tmp_path / "StreamingHistory0.json").write_text(json.dumps(OBJECTS))
+    store_path = str(tmp_path / "history.sqlite3")
+    load_tracks(str(tmp_path), store_path=store_path)
+
+    # Only the new file is imported, so its table alone would leave out the plays of the first
+    (tmp_path / "StreamingHistory1.json").write_text(json.dumps(PLAYS[len(OBJECTS) :]))
+    calls = []
+    load_tracks(
+        str(tmp_path),
+        store_path=store_path,
+        on_file=lambda done, total, tables: calls.append((done, total, list(tables))),
+    )
+    assert calls == [(1, 1, [])]
+
+
+def test_load_tracks_separate_folders(tmp_path: Path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "StreamingHistory0.json").write_text(json.dumps(OBJECTS))
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "StreamingHistory0.json").write_text(json.dumps(PLAYS[len(OBJECTS) :]))
+    store_path = str(tmp_path / "history.sqlite3")
+
+    a = load_tracks(str(tmp_path / "a"), store_path=store_path).tracks
+    b = load_tracks(str(tmp_path / "b"), store_path=store_path).tracks
+    assert b.artist_names() == ["C"]
+    assert b.fingerprint == load_tracks(str(tmp_path / "b")).tracks.fingerprint
+    assert load_tracks(str(tmp_path / "a"), store_path=store_path).tracks.fingerprint == a.fingerprint
+    with HistoryStore(store_path) as store:
+        assert len(store) == len(PLAYS) - 1
+
+
+def test_reimported_file(tmp_path: Path):
+    path = tmp_path / "StreamingHistory0.json"
+    path.write_text(json.dumps(PLAYS))
+    store_path = str(tmp_path / "history.sqlite3")
+    load_tracks(str(tmp_path), store_path=store_path)
+
+    path.write_text(json.dumps(OBJECTS))
+    expected = load_tracks(str(tmp_path)).tracks
+    assert load_tracks(str(tmp_path), store_path=store_path).tracks.fingerprint == expected.fingerprint
@@ -0,0 +1,132 @@
+import datetime
+from typing import List, Optional
+
+import numpy as np
+import pytest
+from backports import zoneinfo
+
+from track import Track
+from tracktable import TrackTable, TrackView, end_times_to_ms, to_ms
+
+OBJECTS: List[Track.JSON] = [
+    {"endTime": "2020-07-07 01:03", "artistName": "B", "trackName": "Two", "msPlayed": 180000},
+    {"endTime": "2020-07-06 23:59", "artistName": "A", "trackName": "One", "msPlayed": 1000},
+    {"endTime": "2021-03-14 07:30", "artistName": "A", "trackName": "Three", "msPlayed": 3723456},
+    {"endTime": "2020-07-07 01:03", "artistName": "B", "trackName": "Two", "msPlayed": 180000},
+]
+
+
+def test_from_json():
+    table = TrackTable.from_json(OBJECTS)
+    assert list(table) == [Track.from_json(obj) for obj in OBJECTS]
+
+
+def test_concatenate():
+    table = TrackTable.concatenate([TrackTable.from_json(OBJECTS[2:]), TrackTable.from_json(OBJECTS[:3])])
+    assert list(table) == sorted({Track.from_json(obj) for obj in OBJECTS}, key=lambda track: track.start)
+    assert sorted(table.artist_names()) == ["A", "B"]
+
+
+def test_concatenate_empty():
+    assert len(TrackTable.concatenate([])) == 0
+    assert len(TrackTable.concatenate([TrackTable.empty()])) == 0
+
+
+def test_take():
+    table = TrackTable.from_json(OBJECTS)
+    assert list(table[1:3]) == [Track.from_json(obj) for obj in OBJECTS[1:3]]
+    assert list(table.take(table.duration > 100000)) == [Track.from_json(OBJECTS[i]) for i in (0, 2, 3)]
+    assert table[-1] == Track.from_json(OBJECTS[-1])
+
+
+@pytest.mark.parametrize("zone", ("America/New_York", "Asia/Kolkata", "Australia/Lord_Howe", "UTC"))
+def test_to_timezone(zone: str):
+    timezone = zoneinfo.ZoneInfo(zone)
+    table = TrackTable.from_json(OBJECTS).to_timezone(timezone)
+    assert list(table) == [Track.from_json(obj).to_timezone(timezone) for obj in OBJECTS]
+    assert table[0].duration == datetime.timedelta(minutes=3)
+
+
+class _EvictedCache(dict):
+    """A timezone cache that another thread empties right after each conversion is added"""
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.clear()
+
+
+def test_to_timezone_evicted():
+    table = TrackTable.from_json(OBJECTS)
+    object.__setattr__(table, "_by_timezone", _EvictedCache())
+    timezone = zoneinfo.ZoneInfo("Asia/Tokyo")
+    assert list(table.to_timezone(timezone)) == [Track.from_json(obj).to_timezone(timezone) for obj in OBJECTS]
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    (
+        "2020-07-07 01:03",
+        "2020-02-29 23:59",
+        "1969-12-31 23:59",
+        "0001-01-01 00:00",
+        "9999-12-31 23:59",
+        "2020-7-7 1:03",
+    ),
+)
+def test_end_times_to_ms(timestamp: str):
+    expected = datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M")
+    assert list(end_times_to_ms([timestamp, "1970-01-01 00:01"])) == [to_ms(expected), 60000]
+
+
+@pytest.mark.parametrize(
+    "timestamp", ("2019-02-29 00:00", "2020-13-01 00:00", "2020-01-01 24:00", "2020-01-01T00:00", "2020-01-01 00:00 ")
+)
+def test_end_times_to_ms_invalid(timestamp: str):
+    with pytest.raises(ValueError):
+        end_times_to_ms(["1970-01-01 00:01", timestamp])
+
+
+@pytest.mark.parametrize("zone", (None, "America/New_York"))
+@pytest.mark.parametrize(
+    "start, end",
+    ((None, None), ("2020-07-06 23:59", None), (None, "2020-07-07 01:03"), ("2020-07-07 00:00", "2021-03-14 07:30")),
+)
+def test_between(zone: Optional[str], start: Optional[str], end: Optional[str]):
+    table = TrackTable.from_json(OBJECTS + [{**OBJECTS[2], "endTime": "2020-07-07 01:02"}])
+    if zone is not None:
+        table = table.to_timezone(zoneinfo.ZoneInfo(zone))
+    start_ms = to_ms(datetime.datetime.fromisoformat(start)) if start else None
+    end_ms = to_ms(datetime.datetime.fromisoformat(end)) if end else None
+
+    expected = [
+        track
+        for track in table
+        if (start is None or track.start.replace(tzinfo=None) >= datetime.datetime.fromisoformat(start))
+        and (end is None or track.end.replace(tzinfo=None) <= datetime.datetime.fromisoformat(end))
+    ]
+    assert list(table.between(start_ms, end_ms)) == expected
+
+
+def test_view():
+    table = TrackTable.from_json(OBJECTS)
+    view = TrackView(table).where(slice(1, None))
+    assert len(view) == 3
+    assert list(view.where(view.table.duration > 100000).table) == list(table.take(np.array([2, 3])))
+
+
+def test_view_between():
+    table = TrackTable.concatenate([TrackTable.from_json(OBJECTS)])
+    view = TrackView(table).between(None, to_ms(datetime.datetime(2020, 7, 7, 1, 3)))
+    assert view.rows == slice(0, 2)
+    assert np.shares_memory(view.table.start, table.start)
+    assert list(view.to_timezone(zoneinfo.ZoneInfo("Asia/Kolkata")).table) == list(
+        table.to_timezone(zoneinfo.ZoneInfo("Asia/Kolkata"))[:2]
+    )
+
+
+def test_fingerprint():
+    table = TrackTable.from_json(OBJECTS)
+    assert table.fingerprint == TrackTable.from_json(OBJECTS).fingerprint
+    assert table.fingerprint != table[1:].fingerprint
+    assert table.fingerprint != TrackTable.from_json([{**OBJECTS[0], "artistName": "C"}] + OBJECTS[1:]).fingerprint
+    assert table.fingerprint != table.to_timezone(zoneinfo.ZoneInfo("UTC")).fingerprint
@@ -1,11 +1,13 @@
 import datetime
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 from unittest import mock
 
+import numpy as np
 import pytest
 
 import utils
 from track import Track
+from tracktable import to_ms
 
 
 @pytest.mark.parametrize(
@@ -50,6 +52,94 @@ def test_in_day(track: Track, day: datetime.date):
     assert utils.in_day(track) == day
 
 
+@pytest.mark.parametrize(
+    "track, hour",
+    (
+        (
+            mock.Mock(start=datetime.datetime(2020, 12, 31, 22, 58), end=datetime.datetime(2020, 12, 31, 23, 1)),
+            datetime.datetime(2020, 12, 31, 22),
+        ),
+        (
+            mock.Mock(start=datetime.datetime(2020, 12, 31, 23, 59), end=datetime.datetime(2021, 1, 1, 0, 1, 1)),
+            datetime.datetime(2021, 1, 1, 0),
+        ),
+        (
+            mock.Mock(start=datetime.datetime(1969, 12, 31, 23, 30), end=datetime.datetime(1970, 1, 1, 0, 30)),
+            datetime.datetime(1969, 12, 31, 23),
+        ),
+    ),
+)
+def test_in_hour(track: Track, hour: datetime.datetime):
+    assert utils.in_hour(track) == hour
+
+
+def test_pin_arrays():
+    start_ms = np.array(
+        [
+            to_ms(datetime.datetime(2020, 12, 31, 23, 58)),
+            to_ms(datetime.datetime(1969, 12, 31, 23, 59)),
+            to_ms(datetime.datetime(2020, 7, 6, 23, 59)),
+        ]
+    )
+    end_ms = np.array(
+        [
+            to_ms(datetime.datetime(2021, 1, 1, 0, 1)),
+            to_ms(datetime.datetime(1970, 1, 1, 0, 1, 1)),
+            to_ms(datetime.datetime(2020, 7, 7, 1, 3)),
+        ]
+    )
+
+    assert utils.in_months(start_ms, end_ms).tolist() == [
+        datetime.date(2020, 12, 1),
+        datetime.date(1970, 1, 1),
+        datetime.date(2020, 7, 1),
+    ]
+    assert utils.in_days(start_ms, end_ms).tolist() == [
+        datetime.date(2020, 12, 31),
+        datetime.date(1970, 1, 1),
+        datetime.date(2020, 7, 7),
+    ]
+    assert utils.in_hours(start_ms, end_ms).astype("datetime64[ms]").tolist() == [
+        datetime.datetime(2020, 12, 31, 23),
+        datetime.datetime(1970, 1, 1, 0),
+        datetime.datetime(2020, 7, 6, 23),
+    ]
+
+
+def _pin_track(
+    start: datetime.datetime, end: datetime.datetime, pinner: Callable[[datetime.datetime], datetime.datetime]
+) -> datetime.datetime:
+    # How plays were pinned one at a time before the array functions
+    pinned_end = pinner(end)
+    return pinned_end if (end - pinned_end > pinned_end - start) else pinner(start)
+
+
+def test_pin_arrays_random_plays():
+    rng = np.random.default_rng(0)
+    # Plays from before and after the epoch, with many ending just past the start of an hour
+    end_ms = rng.integers(to_ms(datetime.datetime(1965, 1, 1)), to_ms(datetime.datetime(2025, 1, 1)), 5000)
+    end_ms[::2] = end_ms[::2] // 3_600_000 * 3_600_000 + rng.integers(0, 120_000, len(end_ms[::2]))
+    start_ms = end_ms - rng.integers(0, 7_200_000, len(end_ms))
+    starts = start_ms.astype("datetime64[ms]").tolist()
+    ends = end_ms.astype("datetime64[ms]").tolist()
+
+    months = [
+        _pin_track(start, end, lambda dt: dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)).date()
+        for start, end in zip(starts, ends)
+    ]
+    days = [
+        _pin_track(start, end, lambda dt: dt.replace(hour=0, minute=0, second=0, microsecond=0)).date()
+        for start, end in zip(starts, ends)
+    ]
+    hours = [
+        _pin_track(start, end, lambda dt: dt.replace(minute=0, second=0, microsecond=0))
+        for start, end in zip(starts, ends)
+    ]
+    assert utils.in_months(start_ms, end_ms).astype("datetime64[D]").tolist() == months
+    assert utils.in_days(start_ms, end_ms).tolist() == days
+    assert utils.in_hours(start_ms, end_ms).astype("datetime64[ms]").tolist() == hours
+
+
 @pytest.mark.parametrize(
     "duration, hours_minutes_seconds",
     (
@@ -73,4 +163,16 @@ def test_hours_minutes_seconds(duration: datetime.timedelta, hours_minutes_secon
     ),
 )
 def test_moving_average(length: int, values: Tuple[float], averages: List[float]):
-    assert utils.moving_average(values, length) == averages
+    assert utils.moving_average(values, length).tolist() == averages
+
+
+@pytest.mark.parametrize("kernel", utils.KERNELS)
+def test_moving_average_block(kernel: str):
+    values = np.array([[1, 1, 1, 1, 5, 3, 5, 1, 1, 1], [0, 0, 0, 0, 0, 9, 0, 0, 0, 0], [2, 2, 2, 2, 2, 2, 2, 2, 2, 2]])
+    averages = utils.moving_average(values, 5, kernel)
+
+    assert averages.shape == values.shape
+    for row, row_averages in zip(values, averages):
+        assert np.allclose(utils.moving_average(row, 5, kernel), row_averages)
+    assert np.allclose(averages[2], 2)
+    assert averages[1][5] == averages[1].max()
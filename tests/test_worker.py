@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+import pytest
+
+from gui.worker import Job, Worker
+
+
+class FakeWidget:
+    def __init__(self):
+        self.scheduled: List[Tuple[Callable[..., None], Tuple[Any, ...]]] = []
+
+    def after(self, _ms: int, callback: Callable[..., None], *args: Any) -> None:
+        self.scheduled.append((callback, args))
+
+    def run_pending(self) -> None:
+        scheduled, self.scheduled = self.scheduled, []
+        for callback, args in scheduled:
+            callback(*args)
+
+
+def _wait(job: Job, widget: FakeWidget) -> None:
+    deadline = time.monotonic() + 5
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    while widget.scheduled:
+        widget.run_pending()
+
+
+def test_result_is_delivered():
+    widget = FakeWidget()
+    results: List[int] = []
+    job = Worker(widget).submit(lambda job: 1 + 1, results.append, on_error=pytest.fail)  # type: ignore
+    _wait(job, widget)
+    assert results == [2]
+
+
+def test_error_is_delivered():
+    widget = FakeWidget()
+    errors: List[Exception] = []
+
+    def run(_job: Job) -> None:
+        raise ValueError("bad")
+
+    job = Worker(widget).submit(run, pytest.fail, on_error=errors.append)  # type: ignore
+    _wait(job, widget)
+    assert [str(error) for error in errors] == ["bad"]
+
+
+def test_superseded_job_is_cancelled_and_ignored():
+    widget = FakeWidget()
+    worker = Worker(widget)
+    started, release = threading.Event(), threading.Event()
+    results: List[str] = []
+
+    def slow(job: Job) -> str:
+        started.set()
+        release.wait(5)
+        job.report(0.5)
+        return "slow"
+
+    first = worker.submit(slow, results.append, on_error=lambda err: results.append(type(err).__name__))
+    started.wait(5)
+    second = worker.submit(lambda job: "fast", results.append, on_error=pytest.fail)  # type: ignore
+    release.set()
+    _wait(first, widget)
+    _wait(second, widget)
+
+    assert first.cancelled
+    assert results == ["fast"]
+
+
+def test_partial_results_are_delivered_before_the_result():
+    widget = FakeWidget()
+    published, release = threading.Event(), threading.Event()
+    delivered: List[str] = []
+
+    def run(job: Job) -> str:
+        job.publish("partial")
+        published.set()
+        release.wait(5)
+        return "done"
+
+    job = Worker(widget).submit(run, delivered.append, on_error=pytest.fail, on_partial=delivered.append)  # type: ignore
+    published.wait(5)
+    widget.run_pending()
+    release.set()
+    _wait(job, widget)
+    assert delivered == ["partial", "done"]